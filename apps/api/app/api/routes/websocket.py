@@ -75,6 +75,9 @@ async def websocket_endpoint(
                 
                 # Handle different message types
                 if message.get("type") == "ping":
+                    # A client ping proves the connection is alive too
+                    manager.update_client_health(client_id)
+                    
                     # Respond to ping with pong
                     await websocket.send_json({
                         "type": "pong",
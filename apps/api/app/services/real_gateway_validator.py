@@ -6,7 +6,6 @@
 
 import sys
 import json
-import asyncio
 import threading
 import time
 from typing import Dict, Any, Optional
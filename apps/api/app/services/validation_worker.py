@@ -5,7 +5,6 @@ This runs in a separate process to avoid threading conflicts.
 """
 import sys
 import json
-import asyncio
 from typing import Dict, Any
 import logging
 
@@ -13,6 +12,21 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# orjson is optional here: the worker must still be able to print its
+# structured result if the subprocess environment lacks it
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _dumps(result: Dict[str, Any]) -> str:
+    """Encode a worker result as a JSON line for the parent process."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(result).decode()
+    return json.dumps(result, ensure_ascii=False)
+
 try:
     from vnpy.event import EventEngine
     from vnpy.trader.engine import MainEngine
@@ -27,6 +41,62 @@ try:
 except ImportError:
     SOPT_AVAILABLE = False
 
+# vnpy setting key -> unified-format fallback key (None when there is no alias)
+_CTP_SETTINGS_SCHEMA = (
+    ("用户名", "userID"),
+    ("密码", "password"),
+    ("经纪商代码", "brokerID"),
+    ("交易服务器", "tdAddress"),
+    ("行情服务器", "mdAddress"),
+    ("产品名称", "appID"),
+    ("授权编码", "authCode"),
+)
+
+_SOPT_SETTINGS_SCHEMA = (
+    ("用户名", "username"),
+    ("密码", "password"),
+    ("经纪商代码", "brokerID"),
+    ("交易服务器", "serverAddress"),
+    ("行情服务器", "serverAddress"),
+    ("产品名称", None),
+    ("授权编码", None),
+)
+
+_SETTINGS_SCHEMAS = {
+    "ctp": _CTP_SETTINGS_SCHEMA,
+    "sopt": _SOPT_SETTINGS_SCHEMA,
+}
+
+# Constant guidance attached to failure results (tuples serialize as JSON arrays)
+_MISSING_FIELDS_RECOMMENDATIONS = (
+    "Check that all required connection settings are provided",
+    "Verify field names match the expected format",
+    "Contact your broker for correct connection parameters",
+)
+
+_NO_SERVERS_RECOMMENDATIONS = (
+    "Verify trading server (交易服务器) address is in format 'host:port'",
+    "Verify market data server (行情服务器) address is in format 'host:port'",
+    "Contact your broker for correct server addresses",
+    "Check for typos in server configuration",
+)
+
+_NETWORK_UNREACHABLE_RECOMMENDATIONS = (
+    "Check internet connection",
+    "Verify server addresses are correct",
+    "Check if trading servers are down for maintenance",
+    "Verify firewall settings allow outbound connections",
+    "Contact your broker to confirm server status",
+    "Try again during trading hours when servers are more likely to be active",
+)
+
+_NETWORK_UNREACHABLE_STEPS = (
+    "1. Check network connectivity: ping google.com",
+    "2. Verify server addresses with your broker",
+    "3. Check if servers are accessible during trading hours",
+    "4. Confirm firewall/proxy settings",
+)
+
 
 def validate_account_sync(account_settings: Dict[str, Any], gateway_type: str, timeout_seconds: int = 30, 
                          is_trading_time: bool = True, allow_non_trading_validation: bool = False) -> Dict[str, Any]:
@@ -74,11 +144,7 @@ def validate_account_sync(account_settings: Dict[str, Any], gateway_type: str, t
                 "error_code": "MISSING_FIELDS", 
                 "missing": missing_fields,
                 "user_friendly_message": f"Please provide the following required fields: {', '.join(missing_fields)}",
-                "recommendations": [
-                    "Check that all required connection settings are provided",
-                    "Verify field names match the expected format",
-                    "Contact your broker for correct connection parameters"
-                ]
+                "recommendations": _MISSING_FIELDS_RECOMMENDATIONS
             }
             return result
         
@@ -109,7 +175,7 @@ def validate_account_sync(account_settings: Dict[str, Any], gateway_type: str, t
                 clean_server = td_server.replace("tcp://", "")
                 if ":" in clean_server:
                     host, port = clean_server.rsplit(":", 1)  # Use rsplit to handle IPv6 addresses
-                    servers_to_test.append(("Trading", host.strip(), int(port)))
+                    servers_to_test.append(("Trading", host.strip().strip("[]"), int(port)))
                 else:
                     logger.warning(f"Trading server missing port: {td_server}")
             except Exception as e:
@@ -121,7 +187,7 @@ def validate_account_sync(account_settings: Dict[str, Any], gateway_type: str, t
                 clean_server = md_server.replace("tcp://", "")
                 if ":" in clean_server:
                     host, port = clean_server.rsplit(":", 1)  # Use rsplit to handle IPv6 addresses
-                    servers_to_test.append(("Market Data", host.strip(), int(port)))
+                    servers_to_test.append(("Market Data", host.strip().strip("[]"), int(port)))
                 else:
                     logger.warning(f"Market data server missing port: {md_server}")
             except Exception as e:
@@ -132,12 +198,7 @@ def validate_account_sync(account_settings: Dict[str, Any], gateway_type: str, t
             result["details"] = {
                 "error_code": "NO_SERVERS",
                 "user_friendly_message": "No valid server addresses configured for connection testing",
-                "recommendations": [
-                    "Verify trading server (交易服务器) address is in format 'host:port'",
-                    "Verify market data server (行情服务器) address is in format 'host:port'",
-                    "Contact your broker for correct server addresses",
-                    "Check for typos in server configuration"
-                ],
+                "recommendations": _NO_SERVERS_RECOMMENDATIONS,
                 "expected_format": "tcp://hostname:port or hostname:port"
             }
             return result
@@ -150,20 +211,29 @@ def validate_account_sync(account_settings: Dict[str, Any], gateway_type: str, t
             logger.info(f"Testing {server_type} server: {host}:{port}")
             
             try:
-                # Create socket and test connection
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(10)  # 10 second timeout per server
-                
+                # Try each resolved address (IPv4 and IPv6) until one connects
                 start_connect = time.time()
-                result_code = sock.connect_ex((host, port))
+                result_code = None
+                connected_addr = None
+                for family, socktype, proto, _, sockaddr in socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM):
+                    sock = socket.socket(family, socktype, proto)
+                    try:
+                        sock.settimeout(10)  # 10 second timeout per address
+                        result_code = sock.connect_ex(sockaddr)
+                    finally:
+                        sock.close()
+                    if result_code == 0:
+                        connected_addr = sockaddr
+                        break
                 connect_time = time.time() - start_connect
                 
-                if result_code == 0:
+                if connected_addr is not None:
                     logger.info(f"✅ {server_type} server connection successful ({connect_time:.2f}s)")
                     connection_results.append({
                         "server_type": server_type,
                         "host": host,
                         "port": port,
+                        "resolved_address": connected_addr[0],
                         "status": "SUCCESS",
                         "connect_time": connect_time
                     })
@@ -178,8 +248,6 @@ def validate_account_sync(account_settings: Dict[str, Any], gateway_type: str, t
                         "error_code": result_code
                     })
                 
-                sock.close()
-                
             except socket.gaierror as e:
                 logger.error(f"❌ {server_type} DNS resolution failed: {e}")
                 connection_results.append({
@@ -238,20 +306,8 @@ def validate_account_sync(account_settings: Dict[str, Any], gateway_type: str, t
                 "validation_type": validation_mode,
                 "is_trading_time": is_trading_time,
                 "user_friendly_message": "Unable to connect to trading servers",
-                "recommendations": [
-                    "Check internet connection",
-                    "Verify server addresses are correct",
-                    "Check if trading servers are down for maintenance",
-                    "Verify firewall settings allow outbound connections",
-                    "Contact your broker to confirm server status",
-                    "Try again during trading hours when servers are more likely to be active"
-                ],
-                "troubleshooting_steps": [
-                    "1. Check network connectivity: ping google.com",
-                    "2. Verify server addresses with your broker",
-                    "3. Check if servers are accessible during trading hours",
-                    "4. Confirm firewall/proxy settings"
-                ]
+                "recommendations": _NETWORK_UNREACHABLE_RECOMMENDATIONS,
+                "troubleshooting_steps": _NETWORK_UNREACHABLE_STEPS
             }
             logger.error(f"❌ Validation FAILED: All {len(servers_to_test)} servers unreachable")
             
@@ -272,27 +328,13 @@ def transform_settings(account_settings: Dict[str, Any], gateway_type: str) -> D
     
     # Check if using new unified format
     if "connect_setting" in account_settings:
-        connect_setting = account_settings["connect_setting"]
-        
-        if gateway_type.lower() == "ctp":
+        schema = _SETTINGS_SCHEMAS.get(gateway_type.lower())
+        if schema is not None:
+            connect_setting = account_settings["connect_setting"]
+            # The vnpy key is usually populated, so the fallback lookup is skipped
             return {
-                "用户名": connect_setting.get("用户名", connect_setting.get("userID", "")),
-                "密码": connect_setting.get("密码", connect_setting.get("password", "")),
-                "经纪商代码": connect_setting.get("经纪商代码", connect_setting.get("brokerID", "")),
-                "交易服务器": connect_setting.get("交易服务器", connect_setting.get("tdAddress", "")),
-                "行情服务器": connect_setting.get("行情服务器", connect_setting.get("mdAddress", "")),
-                "产品名称": connect_setting.get("产品名称", connect_setting.get("appID", "")),
-                "授权编码": connect_setting.get("授权编码", connect_setting.get("authCode", ""))
-            }
-        elif gateway_type.lower() == "sopt":
-            return {
-                "用户名": connect_setting.get("用户名", connect_setting.get("username", "")),
-                "密码": connect_setting.get("密码", connect_setting.get("password", "")),
-                "经纪商代码": connect_setting.get("经纪商代码", connect_setting.get("brokerID", "")),
-                "交易服务器": connect_setting.get("交易服务器", connect_setting.get("serverAddress", "")),
-                "行情服务器": connect_setting.get("行情服务器", connect_setting.get("serverAddress", "")),
-                "产品名称": connect_setting.get("产品名称", ""),
-                "授权编码": connect_setting.get("授权编码", "")
+                key: connect_setting.get(key) or connect_setting.get(fallback, "")
+                for key, fallback in schema
             }
     
     # Legacy flat format - return as is
@@ -316,16 +358,27 @@ if __name__ == "__main__":
         
         # Perform validation
         if use_real_validation:
-            # 使用真实API验证
-            from real_gateway_validator import validate_account_real_sync
-            result = validate_account_real_sync(account_settings, gateway_type, timeout_seconds)
+            # 使用真实API验证; imported here so connectivity-only runs never load it
+            try:
+                from real_gateway_validator import validate_account_real_sync
+            except Exception as e:
+                # Real validation was requested, so never fall back to a connectivity check
+                logger.error(f"Real gateway validator unavailable: {e}")
+                result = {
+                    "success": False,
+                    "message": f"Real gateway validation unavailable: {str(e)}",
+                    "details": {"error_code": "REAL_VALIDATION_UNAVAILABLE", "exception": str(e)},
+                    "timestamp": None
+                }
+            else:
+                result = validate_account_real_sync(account_settings, gateway_type, timeout_seconds)
         else:
             # 使用网络连通性验证
             result = validate_account_sync(account_settings, gateway_type, timeout_seconds, 
                                          is_trading_time, allow_non_trading_validation)
         
         # Output result as JSON
-        print(json.dumps(result))
+        print(_dumps(result))
         sys.exit(0)
         
     except Exception as e:
@@ -335,5 +388,5 @@ if __name__ == "__main__":
             "details": {"error_code": "WORKER_ERROR", "exception": str(e)},
             "timestamp": None
         }
-        print(json.dumps(error_result))
+        print(_dumps(error_result))
         sys.exit(1)
\ No newline at end of file
@@ -2,10 +2,16 @@
 
 import logging
 import asyncio
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from datetime import datetime, timezone
 
 from app.services.websocket_manager import WebSocketManager
+from app.utils.timezone import CHINA_TZ
+
+logger = logging.getLogger(__name__)
+
+# What Handler.format falls back to when no formatter is set
+_default_formatter = logging.Formatter()
 
 
 class WebSocketLogHandler(logging.Handler):
@@ -25,8 +31,17 @@ class WebSocketLogHandler(logging.Handler):
         self._websocket_manager: Optional[WebSocketManager] = None
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         
+        # Bounded queue drained by a single task; the oldest records are
+        # dropped when clients can't keep up
+        self._max_queue_size = 10000
+        self._drop_warning_interval = 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self._dropped_count = 0
+        
         # Prevent recursive logging from these modules
         self._excluded_loggers = {
+            "app.services.websocket_log_handler",
             "app.services.websocket_manager",
             "app.api.routes.websocket",
             "websockets",
@@ -61,47 +76,144 @@ class WebSocketLogHandler(logging.Handler):
             if self._websocket_manager.get_connection_count() == 0:
                 return
             
-            # Get or create event loop
+            # Only records emitted on the event loop thread can be queued
             try:
-                if self._loop is None or self._loop.is_closed():
-                    self._loop = asyncio.get_running_loop()
+                loop = asyncio.get_running_loop()
             except RuntimeError:
                 # No running loop, skip
                 return
             
-            # Format the log message
             log_level = self._level_map.get(record.levelno, "INFO")
             
             # Broadcast all levels including DEBUG for VNPy troubleshooting
-            if log_level not in ["DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"]:
+            if log_level not in {"DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"}:
                 return
             
-            # Extract source from logger name
-            source = record.name.split('.')[-1] if record.name else "unknown"
+            self._ensure_drain_task(loop)
+            self._enqueue(self._prepare(record, log_level))
             
-            # Build metadata
-            metadata = {
-                "logger_name": record.name,
-                "module": record.module,
-                "function": record.funcName,
-                "line": record.lineno
-            }
+        except Exception:
+            # Silently fail to avoid breaking the logging system
+            pass
+    
+    def _prepare(self, record: logging.LogRecord, log_level: str) -> Tuple[str, Dict[str, Any], str, Dict[str, Any]]:
+        """
+        Capture a record's fields as plain values for queueing.
+        
+        Only what can't wait is done now: the message is merged with its args
+        and any traceback is rendered to exc_text, so later changes to the args
+        are not seen and queued items don't keep args, exc_info or traceback
+        frames alive. Applying the formatter is left to the drain task, so
+        records dropped from a full queue are never formatted.
+        
+        Args:
+            record: The log record to capture
+            log_level: System log level mapped from the record
+            
+        Returns:
+            Tuple of (level, record fields, source, metadata)
+        """
+        # Extract source from logger name
+        source = record.name.split('.')[-1] if record.name else "unknown"
+        
+        # Build metadata
+        metadata = {
+            "logger_name": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno
+        }
+        
+        # Add extra fields from structured logging if available
+        if hasattr(record, 'extra'):
+            metadata.update(record.extra)
+        
+        fields = dict(record.__dict__)
+        fields["msg"] = record.getMessage()
+        fields["args"] = None
+        if record.exc_info and not record.exc_text:
+            fields["exc_text"] = (self.formatter or _default_formatter).formatException(record.exc_info)
+        fields["exc_info"] = None
+        
+        return log_level, fields, source, metadata
+    
+    def _ensure_drain_task(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Create the queue and drain task for the running loop if needed."""
+        if self._loop is not loop or self._drain_task is None or self._drain_task.done():
+            # Don't leave a task behind on a loop we're moving away from
+            self._cancel_drain_task()
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+            self._drain_task = loop.create_task(self._drain_loop(self._queue))
+    
+    def _cancel_drain_task(self) -> None:
+        """Cancel the drain task, if one is still running."""
+        task, self._drain_task = self._drain_task, None
+        if task is not None and not task.done():
+            try:
+                task.cancel()
+            except RuntimeError:
+                # Its loop is already closed, so the task can never run again
+                pass
+    
+    def close(self) -> None:
+        """Stop the drain task and close the handler."""
+        self._cancel_drain_task()
+        super().close()
+    
+    def _enqueue(self, item: Tuple[str, Dict[str, Any], str, Dict[str, Any]]) -> None:
+        """Queue a record for broadcast, dropping the oldest one when full."""
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                self._queue.get_nowait()
+                self._dropped_count += 1
+            except asyncio.QueueEmpty:
+                pass
+            self._queue.put_nowait(item)
             
-            # Add extra fields from structured logging if available
-            if hasattr(record, 'extra'):
-                metadata.update(record.extra)
+            if self._dropped_count % self._drop_warning_interval == 0:
+                logger.warning(
+                    f"WebSocket log queue full, dropped {self._dropped_count} records so far"
+                )
+    
+    async def _drain_loop(self, queue: asyncio.Queue) -> None:
+        """Format and broadcast queued log records one at a time."""
+        while True:
+            log_level, fields, source, metadata = await queue.get()
+            try:
+                message = self.format(logging.makeLogRecord(fields))
+            except Exception:
+                # A record that can't be formatted is skipped, as emit would
+                continue
+            await self._publish(log_level, message, source, metadata, fields["created"])
+    
+    async def _publish(self, log_level: str, message: str, source: str,
+                       metadata: Dict[str, Any], created: float) -> None:
+        """
+        Broadcast a prepared log record via WebSocket.
+        
+        Args:
+            log_level: System log level mapped from the record
+            message: Formatted log message
+            source: Source component
+            metadata: Logger and call-site metadata
+            created: Time the record was created, in epoch seconds
+        """
+        try:
+            # Clients may have gone away since the record was queued
+            if self._websocket_manager.get_connection_count() == 0:
+                return
             
-            # Create coroutine for async broadcast
-            coro = self._websocket_manager.publish_log_event(
+            await self._websocket_manager.publish_log_event(
                 level=log_level,
-                message=self.format(record),
+                message=message,
                 source=source,
-                metadata=metadata
+                metadata=metadata,
+                timestamp=datetime.fromtimestamp(created, CHINA_TZ).isoformat(timespec="milliseconds")
             )
             
-            # Schedule the coroutine
-            asyncio.create_task(coro)
-            
         except Exception:
             # Silently fail to avoid breaking the logging system
             pass
@@ -116,12 +228,9 @@ def setup_websocket_logging():
     formatter = logging.Formatter('%(message)s')
     ws_handler.setFormatter(formatter)
     
-    # Add to root logger
+    # Add to root logger only; structlog records propagate here, so a second
+    # registration on the "structlog" logger would broadcast them twice
     root_logger = logging.getLogger()
     root_logger.addHandler(ws_handler)
     
-    # Also add to structlog logger
-    structlog_logger = logging.getLogger("structlog")
-    structlog_logger.addHandler(ws_handler)
-    
     return ws_handler
\ No newline at end of file
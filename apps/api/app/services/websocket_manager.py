@@ -1,21 +1,114 @@
 """WebSocket connection manager for handling multiple client connections."""
 
 import asyncio
+import time
 import uuid
-from typing import Dict, Set, Optional, Any, List
+from typing import Dict, Set, Optional, Any, List, Iterable, Iterator, Tuple
 from fastapi import WebSocket
 import logging
 import json
-from datetime import datetime, timezone
+import orjson
+from datetime import datetime, timezone, timedelta
 from collections import deque
+from itertools import islice
+from dataclasses import dataclass, field
 
 from app.services.event_bus import event_bus
 # Import timezone utilities
-from app.utils.timezone import now_china, to_china_tz, CHINA_TZ
+from app.utils.timezone import now_china, now_china_iso, to_china_tz, CHINA_TZ
 
 logger = logging.getLogger(__name__)
 
 
+def _dumps(message: Any) -> str:
+    """Encode a message as a JSON text frame; unknown types fall back to str()."""
+    return orjson.dumps(message, default=str).decode()
+
+
+# Liveness probe sent to every client each ping interval; it carries no
+# per-round data, so it is encoded once at import
+PING_FRAME = _dumps({"type": "ping"})
+
+
+class ByteBoundedDeque(deque):
+    """
+    Deque of messages capped by total encoded size as well as by length.
+    
+    The oldest messages are evicted to make room, so one bulky event can't
+    pin an unbounded amount of memory. Each message's encoded frame is kept
+    alongside it, so measuring it and sending it later share one encode.
+    Only append/popleft/clear keep the accounting, which is all the
+    manager's buffers use.
+    """
+    
+    _drop_warning_interval = 100
+    
+    def __init__(self, max_bytes: int, maxlen: Optional[int] = None, name: str = "buffer"):
+        super().__init__(maxlen=maxlen)
+        self.max_bytes = max_bytes
+        self.name = name
+        self.nbytes = 0
+        self.dropped_count = 0
+        self._payloads: deque = deque()
+    
+    def append(self, message: Any, payload: Optional[str] = None) -> None:
+        """
+        Add a message, evicting the oldest ones if it would exceed either cap.
+        
+        Args:
+            message: The message to buffer
+            payload: The message already encoded with _dumps, if the caller has it
+        """
+        if payload is None:
+            payload = _dumps(message)
+        size = len(payload)
+        if size > self.max_bytes:
+            # Would evict everything and still not fit
+            self._record_drop()
+            return
+        
+        while self and (len(self) == self.maxlen or self.nbytes + size > self.max_bytes):
+            self.popleft()
+            self._record_drop()
+        
+        super().append(message)
+        self._payloads.append(payload)
+        self.nbytes += size
+    
+    def popleft(self) -> Any:
+        return self.popleft_encoded()[0]
+    
+    def popleft_encoded(self) -> Tuple[Any, str]:
+        """Remove the oldest message, returning it with its encoded frame."""
+        message = super().popleft()
+        payload = self._payloads.popleft()
+        self.nbytes -= len(payload)
+        return message, payload
+    
+    def iter_encoded(self) -> Iterator[Tuple[Any, str]]:
+        """Iterate over (message, encoded frame) pairs, oldest first."""
+        return zip(self, self._payloads)
+    
+    def clear(self) -> None:
+        super().clear()
+        self._payloads.clear()
+        self.nbytes = 0
+    
+    def _record_drop(self) -> None:
+        self.dropped_count += 1
+        if self.dropped_count % self._drop_warning_interval == 0:
+            logger.warning(f"WebSocket {self.name} full, dropped {self.dropped_count} messages so far")
+
+
+@dataclass
+class ConnectionState:
+    """Outbound and liveness state for a single WebSocket connection."""
+    websocket: WebSocket
+    queue: asyncio.Queue
+    sender: Optional[asyncio.Task] = None
+    last_seen: float = field(default_factory=time.monotonic)  # time.monotonic() of last sign of life
+
+
 class WebSocketManager:
     """Manages WebSocket connections and broadcasts messages to connected clients."""
     
@@ -34,27 +127,39 @@ class WebSocketManager:
         
     def _initialize(self):
         """Initialize the WebSocket manager attributes."""
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.connection_health: Dict[str, datetime] = {}
+        self.active_connections: Dict[str, ConnectionState] = {}
+        self._send_queue_size = 256  # pending frames per client before eviction
+        self._broadcast_chunk_size = 50  # clients enqueued between event loop yields
         self._ping_interval = 30  # seconds
         self._ping_timeout = 10  # seconds
         self._ping_task: Optional[asyncio.Task] = None
         self._lock = asyncio.Lock()
         
+        # Every background task the manager starts (monitor, drainer, senders),
+        # so shutdown can cancel them together and none are garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+        
         # Event filtering and rate limiting
         self._event_filters = {
             "gateway_status_change": self._filter_gateway_event,
             "gateway_recovery_status": self._filter_recovery_event,
             "system_log": self._filter_log_event
         }
-        self._rate_limit_window = 1.0  # seconds
-        self._rate_limit_max_events = 100
-        self._event_buffer = deque(maxlen=1000)
-        self._last_flush_time = now_china()
+        # Token bucket: events spend a token each, tokens refill at a steady
+        # rate; events that find the bucket empty wait in the buffer
+        self._rate_limit_rate = 100.0  # tokens per second
+        self._rate_limit_capacity = 200.0  # maximum burst
+        self._rate_limit_max_events = 100  # events sent per drain step
+        self._tokens = self._rate_limit_capacity
+        self._last_refill = time.monotonic()
+        self._batch_max_events = 50  # events per event_batch frame
+        self._event_buffer_max_bytes = 4 * 1024 * 1024
+        self._event_buffer = ByteBoundedDeque(self._event_buffer_max_bytes, maxlen=1000, name="event buffer")
+        self._drain_task: Optional[asyncio.Task] = None
         
         # Log buffer for system logs
-        self._log_buffer = deque(maxlen=500)
-        self._log_levels = ["DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"]
+        self._log_buffer = ByteBoundedDeque(1024 * 1024, maxlen=500, name="log buffer")
+        self._log_levels = frozenset(("DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"))
         
         # Subscribe to event bus
         self._setup_event_subscriptions()
@@ -74,10 +179,19 @@ class WebSocketManager:
     async def force_flush_events(self) -> None:
         """Force flush event buffer for testing."""
         if self._event_buffer:
-            events_to_send = list(self._event_buffer)
-            self._event_buffer.clear()
-            for event in events_to_send:
-                await self.broadcast(event)
+            # Swap in a fresh buffer instead of copying the old one
+            events_to_send = self._event_buffer
+            self._event_buffer = ByteBoundedDeque(
+                self._event_buffer_max_bytes, maxlen=events_to_send.maxlen, name="event buffer"
+            )
+            await self._broadcast_batched(events_to_send.iter_encoded())
+        await self.flush_client_queues()
+    
+    async def flush_client_queues(self) -> None:
+        """Wait until queued messages have been sent to every client, for testing."""
+        await asyncio.gather(
+            *(state.queue.join() for state in list(self.active_connections.values()))
+        )
     
     async def connect(self, websocket: WebSocket) -> str:
         """
@@ -90,13 +204,18 @@ class WebSocketManager:
             The client ID assigned to this connection
         """
         client_id = str(uuid.uuid4())
+        state = ConnectionState(
+            websocket=websocket,
+            queue=asyncio.Queue(maxsize=self._send_queue_size)
+        )
+        state.sender = self._spawn(self._client_sender(client_id, state))
+        
         async with self._lock:
-            self.active_connections[client_id] = websocket
-            self.connection_health[client_id] = now_china()
+            self.active_connections[client_id] = state
             
         # Start ping monitoring if not already running
         if self._ping_task is None or self._ping_task.done():
-            self._ping_task = asyncio.create_task(self._monitor_connections())
+            self._ping_task = self._spawn(self._monitor_connections())
             
         logger.info(f"WebSocket connection added: {client_id}, total connections: {len(self.active_connections)}")
         return client_id
@@ -108,39 +227,124 @@ class WebSocketManager:
         Args:
             client_id: The client ID to disconnect
         """
+        await self._disconnect_many([client_id])
+    
+    async def _disconnect_many(self, client_ids: Iterable[str]) -> List[ConnectionState]:
+        """
+        Remove several WebSocket connections in one critical section.
+        
+        Args:
+            client_ids: The client IDs to disconnect; unknown IDs are ignored
+            
+        Returns:
+            The states of the connections that were removed
+        """
+        removed: List[ConnectionState] = []
         async with self._lock:
-            if client_id in self.active_connections:
-                del self.active_connections[client_id]
-                del self.connection_health[client_id]
+            for client_id in client_ids:
+                state = self.active_connections.pop(client_id, None)
+                if state is None:
+                    continue
+                removed.append(state)
                 logger.info(f"WebSocket connection removed: {client_id}, remaining connections: {len(self.active_connections)}")
+        
+        current_task = asyncio.current_task()
+        for state in removed:
+            # A sender that hit a send error disconnects itself; don't cancel it from inside
+            if state.sender is not None and state.sender is not current_task:
+                state.sender.cancel()
+            
+            # Drop undelivered frames so anyone waiting on the queue is released
+            while not state.queue.empty():
+                state.queue.get_nowait()
+                state.queue.task_done()
+        
+        return removed
+    
+    async def _client_sender(self, client_id: str, state: ConnectionState) -> None:
+        """
+        Send queued frames to a single client until a send fails.
+        
+        Args:
+            client_id: The client ID this sender serves
+            state: The connection state holding the websocket and its queue
+        """
+        while True:
+            payload = await state.queue.get()
+            try:
+                await state.websocket.send_text(payload)
+            except Exception as e:
+                logger.error(f"Error sending message to client {client_id}: {str(e)}")
+                break
+            finally:
+                state.queue.task_done()
+        
+        await self.disconnect(client_id)
     
-    async def broadcast(self, message: dict) -> None:
+    async def broadcast(self, message: dict, payload: Optional[str] = None) -> None:
         """
         Broadcast a message to all connected clients.
         
+        The message is sent as-is and never modified; producers are
+        responsible for stamping it with a timestamp.
+        
         Args:
             message: The message dictionary to broadcast
+            payload: The message already encoded with _dumps, if the caller has it
         """
         if not self.active_connections:
             return
-            
-        # Add timestamp if not present
-        if "timestamp" not in message:
-            message["timestamp"] = now_china().isoformat()
-            
-        disconnected_clients = []
         
-        # Send to all clients
-        for client_id, websocket in self.active_connections.items():
+        if payload is None:
+            payload = _dumps(message)
+        
+        # Hand the frame to each client's sender; nothing here waits on the network
+        slow_clients: List[str] = []
+        if len(self.active_connections) == 1:
+            # Common single-dashboard case: skip the fan-out machinery. Frames
+            # still go through the queue so they stay ordered behind earlier ones
+            client_id, state = next(iter(self.active_connections.items()))
             try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error sending message to client {client_id}: {str(e)}")
-                disconnected_clients.append(client_id)
+                state.queue.put_nowait(payload)
+                return
+            except asyncio.QueueFull:
+                logger.warning(f"WebSocket client {client_id} is not keeping up, disconnecting")
+                slow_clients.append(client_id)
+        elif len(self.active_connections) <= self._broadcast_chunk_size:
+            self._enqueue_payload(self.active_connections.items(), payload, slow_clients)
+        else:
+            # Large fan-out: work from a snapshot and yield between chunks so
+            # other tasks aren't starved
+            connections = list(self.active_connections.items())
+            for i in range(0, len(connections), self._broadcast_chunk_size):
+                self._enqueue_payload(
+                    connections[i:i + self._broadcast_chunk_size], payload, slow_clients
+                )
+                await asyncio.sleep(0)
         
-        # Clean up disconnected clients
-        for client_id in disconnected_clients:
-            await self.disconnect(client_id)
+        # Evict clients whose queue is full
+        if slow_clients:
+            for state in await self._disconnect_many(slow_clients):
+                try:
+                    await state.websocket.close(code=1013)  # Try Again Later
+                except Exception:
+                    pass
+    
+    def _enqueue_payload(self, connections: Iterable, payload: str, slow_clients: List[str]) -> None:
+        """
+        Queue a payload for each connection, collecting clients whose queue is full.
+        
+        Args:
+            connections: (client_id, ConnectionState) pairs to send to
+            payload: The encoded frame
+            slow_clients: List that receives the IDs of clients that can't keep up
+        """
+        for client_id, state in connections:
+            try:
+                state.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                logger.warning(f"WebSocket client {client_id} is not keeping up, disconnecting")
+                slow_clients.append(client_id)
     
     async def send_to_client(self, client_id: str, message: dict) -> bool:
         """
@@ -153,12 +357,12 @@ class WebSocketManager:
         Returns:
             True if message was sent successfully, False otherwise
         """
-        websocket = self.active_connections.get(client_id)
-        if not websocket:
+        state = self.active_connections.get(client_id)
+        if not state:
             return False
             
         try:
-            await websocket.send_json(message)
+            await state.websocket.send_text(_dumps(message))
             return True
         except Exception as e:
             logger.error(f"Error sending message to client {client_id}: {str(e)}")
@@ -174,32 +378,35 @@ class WebSocketManager:
                 # Sleep for ping interval
                 await asyncio.sleep(self._ping_interval)
                 
-                current_time = now_china()
+                current_time = time.monotonic()
+                stale_after = self._ping_interval + self._ping_timeout
                 disconnected_clients = []
                 
-                # Check each connection
-                for client_id, websocket in list(self.active_connections.items()):
-                    try:
-                        # Check if connection is stale
-                        last_seen = self.connection_health.get(client_id)
-                        if last_seen and (current_time - last_seen).total_seconds() > (self._ping_interval + self._ping_timeout):
-                            logger.warning(f"WebSocket client {client_id} failed to respond to ping")
-                            disconnected_clients.append(client_id)
-                            continue
-                        
-                        # Send ping
-                        await websocket.send_json({
-                            "type": "ping",
-                            "timestamp": current_time.isoformat()
-                        })
-                        
-                    except Exception as e:
-                        logger.error(f"Error pinging client {client_id}: {str(e)}")
+                # Drop stale connections and ping the rest from a snapshot;
+                # lookups used per client are bound once up front
+                to_ping = []
+                mark_stale = disconnected_clients.append
+                add_ping = to_ping.append
+                for client_id, state in list(self.active_connections.items()):
+                    if current_time - state.last_seen > stale_after:
+                        logger.warning(f"WebSocket client {client_id} failed to respond to ping")
+                        mark_stale(client_id)
+                    else:
+                        add_ping((client_id, state))
+                
+                # Ping concurrently so one slow peer doesn't delay the others
+                results = await asyncio.gather(
+                    *(state.websocket.send_text(PING_FRAME) for _, state in to_ping),
+                    return_exceptions=True
+                )
+                for (client_id, _), result in zip(to_ping, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Error pinging client {client_id}: {str(result)}")
                         disconnected_clients.append(client_id)
                 
                 # Clean up disconnected clients
-                for client_id in disconnected_clients:
-                    await self.disconnect(client_id)
+                if disconnected_clients:
+                    await self._disconnect_many(disconnected_clients)
                     
             except Exception as e:
                 logger.error(f"Error in connection monitoring: {str(e)}")
@@ -209,39 +416,58 @@ class WebSocketManager:
     
     def update_client_health(self, client_id: str) -> None:
         """Update the last seen timestamp for a client."""
-        if client_id in self.connection_health:
-            self.connection_health[client_id] = now_china()
+        state = self.active_connections.get(client_id)
+        if state is not None:
+            state.last_seen = time.monotonic()
     
     async def shutdown(self) -> None:
         """Gracefully shutdown all connections."""
         logger.info(f"Shutting down WebSocket manager with {len(self.active_connections)} active connections")
         
-        # Cancel ping monitoring
-        if self._ping_task and not self._ping_task.done():
-            self._ping_task.cancel()
-            try:
-                await self._ping_task
-            except asyncio.CancelledError:
-                pass
+        # Stop ping monitoring and the event buffer drainer before closing sockets
+        await self._cancel_tasks(task for task in (self._ping_task, self._drain_task) if task)
         
         # Close all connections
-        shutdown_message = {
+        shutdown_payload = _dumps({
             "event_type": "shutdown",
             "message": "Server is shutting down"
-        }
+        })
         
-        for client_id in list(self.active_connections.keys()):
-            try:
-                websocket = self.active_connections[client_id]
-                await websocket.send_json(shutdown_message)
-                await websocket.close()
-            except Exception as e:
-                logger.error(f"Error closing connection {client_id}: {str(e)}")
-            finally:
-                await self.disconnect(client_id)
+        async def close_connection(websocket: WebSocket) -> None:
+            await websocket.send_text(shutdown_payload)
+            await websocket.close()
+        
+        connections = list(self.active_connections.items())
+        results = await asyncio.gather(
+            *(close_connection(state.websocket) for _, state in connections),
+            return_exceptions=True
+        )
+        
+        for (client_id, _), result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error closing connection {client_id}: {str(result)}")
+        await self._disconnect_many(client_id for client_id, _ in connections)
+        
+        # Reap whatever is left, including the senders cancelled above
+        await self._cancel_tasks(list(self._tasks))
         
         logger.info("WebSocket manager shutdown complete")
     
+    def _spawn(self, coro) -> asyncio.Task:
+        """Start a background task tracked by the manager until it finishes."""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+    
+    async def _cancel_tasks(self, tasks: Iterable[asyncio.Task]) -> None:
+        """Cancel tasks and wait for all of them to finish."""
+        current_task = asyncio.current_task()
+        pending = [task for task in tasks if not task.done() and task is not current_task]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    
     def get_connection_count(self) -> int:
         """Get the number of active connections."""
         return len(self.active_connections)
@@ -250,13 +476,16 @@ class WebSocketManager:
         """Get information about all active connections."""
         info = {}
         current_time = now_china()
+        current_monotonic = time.monotonic()
         
-        for client_id, _ in self.active_connections.items():
-            last_seen = self.connection_health.get(client_id)
+        for client_id, state in self.active_connections.items():
+            # Health is tracked on the monotonic clock; convert to wall time for display
+            seconds_since_last_seen = current_monotonic - state.last_seen
+            last_seen_iso = (current_time - timedelta(seconds=seconds_since_last_seen)).isoformat()
             info[client_id] = {
-                "connected_since": last_seen.isoformat() if last_seen else None,
-                "last_seen": last_seen.isoformat() if last_seen else None,
-                "seconds_since_last_seen": (current_time - last_seen).total_seconds() if last_seen else None
+                "connected_since": last_seen_iso,
+                "last_seen": last_seen_iso,
+                "seconds_since_last_seen": seconds_since_last_seen
             }
         
         return info
@@ -272,10 +501,14 @@ class WebSocketManager:
     async def _handle_gateway_event(self, event_data: Dict[str, Any]) -> None:
         """Handle gateway status change events."""
         try:
+            # Filter before building anything so rejected events cost nothing
+            if not self._event_filters["gateway_status_change"](event_data):
+                return
+            
             # Transform internal event to client format
             client_event = {
                 "event_type": "gateway_status_change",
-                "timestamp": event_data.get("timestamp", now_china().isoformat()),
+                "timestamp": event_data.get("timestamp") or now_china_iso(),
                 "gateway_id": event_data.get("gateway_id"),
                 "gateway_type": event_data.get("gateway_type"),
                 "previous_status": event_data.get("previous_status"),
@@ -292,10 +525,14 @@ class WebSocketManager:
     async def _handle_recovery_event(self, event_data: Dict[str, Any]) -> None:
         """Handle gateway recovery status events."""
         try:
+            # Filter before building anything so rejected events cost nothing
+            if not self._event_filters["gateway_recovery_status"](event_data):
+                return
+            
             # Transform internal event to client format
             client_event = {
                 "event_type": "gateway_recovery_status",
-                "timestamp": event_data.get("timestamp", now_china().isoformat()),
+                "timestamp": event_data.get("timestamp") or now_china_iso(),
                 "gateway_id": event_data.get("gateway_id"),
                 "recovery_status": event_data.get("status"),
                 "attempt": event_data.get("attempt"),
@@ -309,7 +546,8 @@ class WebSocketManager:
         except Exception as e:
             logger.error(f"Error handling recovery event: {str(e)}")
     
-    async def publish_log_event(self, level: str, message: str, source: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+    async def publish_log_event(self, level: str, message: str, source: str, metadata: Optional[Dict[str, Any]] = None,
+                                timestamp: Optional[str] = None) -> None:
         """
         Publish a system log event to WebSocket clients.
         
@@ -318,24 +556,30 @@ class WebSocketManager:
             message: Log message
             source: Source component
             metadata: Additional metadata
+            timestamp: ISO time the log was recorded (defaults to now)
         """
+        # Same check as _filter_log_event, made on the bare level so nothing
+        # is allocated for records that are dropped
         if level not in self._log_levels:
             return
             
         log_event = {
             "event_type": "system_log",
-            "timestamp": now_china().isoformat(),
+            "timestamp": timestamp or now_china_iso(),
             "level": level,
             "message": message,
             "source": source,
             "metadata": metadata or {}
         }
         
+        # Encode once; the buffer's size accounting and the broadcast share it
+        payload = _dumps(log_event)
+        
         # Add to log buffer
-        self._log_buffer.append(log_event)
+        self._log_buffer.append(log_event, payload)
         
         # Broadcast to clients
-        await self._rate_limited_broadcast(log_event)
+        await self._rate_limited_broadcast(log_event, payload)
     
     async def publish_canary_tick_update(self, gateway_id: str, contract_symbol: str, tick_count_1min: int, 
                                        last_tick_time: str, status: str, threshold_seconds: int) -> None:
@@ -352,7 +596,7 @@ class WebSocketManager:
         """
         canary_event = {
             "event_type": "canary_tick_update",
-            "timestamp": now_china().isoformat(),
+            "timestamp": now_china_iso(),
             "gateway_id": gateway_id,
             "contract_symbol": contract_symbol,
             "tick_count_1min": tick_count_1min,
@@ -364,25 +608,66 @@ class WebSocketManager:
         # Broadcast to clients (no rate limiting for canary updates - they're important)
         await self.broadcast(canary_event)
     
-    async def _rate_limited_broadcast(self, event: Dict[str, Any]) -> None:
-        """Apply rate limiting to event broadcasts."""
-        current_time = now_china()
-        
-        # Add event to buffer
-        self._event_buffer.append(event)
+    def _refill_tokens(self) -> None:
+        """Add the tokens accrued since the last refill, up to capacity."""
+        now = time.monotonic()
+        self._tokens = min(
+            self._rate_limit_capacity,
+            self._tokens + (now - self._last_refill) * self._rate_limit_rate
+        )
+        self._last_refill = now
+    
+    async def _rate_limited_broadcast(self, event: Dict[str, Any], payload: Optional[str] = None) -> None:
+        """Apply token-bucket rate limiting to event broadcasts."""
+        self._refill_tokens()
         
-        # Check if we should flush the buffer
-        time_since_flush = (current_time - self._last_flush_time).total_seconds()
+        # Send straight away while tokens last, unless older events are still
+        # waiting (they must go first to keep ordering)
+        if self._tokens >= 1 and not self._event_buffer:
+            self._tokens -= 1
+            await self.broadcast(event, payload)
+            return
         
-        if time_since_flush >= self._rate_limit_window or len(self._event_buffer) >= self._rate_limit_max_events:
-            # Flush events
-            events_to_send = list(self._event_buffer)[:self._rate_limit_max_events]
-            self._event_buffer.clear()
-            self._last_flush_time = current_time
+        self._event_buffer.append(event, payload)
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = self._spawn(self._drain_event_buffer())
+    
+    async def _drain_event_buffer(self) -> None:
+        """Send buffered events as tokens become available."""
+        while self._event_buffer:
+            self._refill_tokens()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self._rate_limit_rate)
+                continue
             
-            # Broadcast each event
-            for event in events_to_send:
-                await self.broadcast(event)
+            count = min(len(self._event_buffer), int(self._tokens), self._rate_limit_max_events)
+            events_to_send = [self._event_buffer.popleft_encoded() for _ in range(count)]
+            self._tokens -= count
+            
+            await self._broadcast_batched(events_to_send)
+    
+    async def _broadcast_batched(self, events: Iterable[Tuple[Dict[str, Any], str]]) -> None:
+        """
+        Broadcast buffered events, coalescing them into event_batch frames.
+        
+        Args:
+            events: (event, encoded frame) pairs to send, in order
+        """
+        timestamp = now_china_iso()
+        # The batch frame is spliced from the events' existing encodings
+        frame_prefix = '{"event_type":"event_batch","timestamp":' + _dumps(timestamp) + ',"events":['
+        events = iter(events)
+        
+        while chunk := list(islice(events, self._batch_max_events)):
+            if len(chunk) == 1:
+                # No point wrapping a lone event
+                await self.broadcast(*chunk[0])
+            else:
+                messages, payloads = zip(*chunk)
+                await self.broadcast(
+                    {"event_type": "event_batch", "timestamp": timestamp, "events": list(messages)},
+                    frame_prefix + ",".join(payloads) + "]}"
+                )
     
     def _filter_gateway_event(self, event_data: Dict[str, Any]) -> bool:
         """Filter gateway status events."""
@@ -420,7 +705,7 @@ class WebSocketManager:
         try:
             control_event = {
                 "event_type": "gateway_control_action",
-                "timestamp": now_china().isoformat(),
+                "timestamp": now_china_iso(),
                 "gateway_id": gateway_id,
                 "action": action,
                 "status": status,
@@ -1,22 +1,37 @@
 """
 ZeroMQ Publisher Service for market data distribution.
-Handles tick data publishing with msgpack serialization and topic-based routing.
+Handles tick data publishing with MessagePack serialization and topic-based routing.
 """
+import asyncio
 import logging
 import time
 import threading
+from collections import deque
+from dataclasses import dataclass, fields, is_dataclass
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import structlog
 import zmq
 import msgpack
 import os
 
+# Prefer the Rust MessagePack encoder; the wire format is identical, so
+# subscribers keep decoding with msgpack either way
+try:
+    import ormsgpack
+    ORMSGPACK_AVAILABLE = True
+except ImportError:
+    ORMSGPACK_AVAILABLE = False
+
 # ZMQ Configuration moved from CTP config to environment variables
 ZMQ_SETTINGS = {
     "port": int(os.getenv("ZMQ_PUBLISHER_PORT", "5555")),
     "bind_address": os.getenv("ZMQ_BIND_ADDRESS", "tcp://*"),
     "queue_size": int(os.getenv("ZMQ_QUEUE_SIZE", "1000")),
+    "batch_size": int(os.getenv("ZMQ_BATCH_SIZE", "1")),
+    "flush_interval_ms": float(os.getenv("ZMQ_FLUSH_INTERVAL_MS", "1")),
+    "nodrop": os.getenv("ZMQ_NODROP", "false").lower() == "true",
+    "io_threads": int(os.getenv("ZMQ_IO_THREADS", "1")),
     "enabled": os.getenv("ENABLE_ZMQ_PUBLISHER", "true").lower() == "true"
 }
 from app.config.performance_thresholds import (
@@ -24,6 +39,56 @@ from app.config.performance_thresholds import (
     validate_performance_metric,
     get_environment_config
 )
+from app.utils.timezone import now_china, now_china_iso
+
+
+@dataclass(slots=True)
+class TickPayload:
+    """Wire format of a published tick, encoded as a MessagePack map."""
+    symbol: Optional[str]
+    datetime: Optional[datetime]
+    last_price: Optional[float]
+    volume: Optional[float]
+    last_volume: Optional[float]
+    bid_price_1: Optional[float]
+    ask_price_1: Optional[float]
+    bid_volume_1: Optional[float]
+    ask_volume_1: Optional[float]
+    vt_symbol: Optional[str]
+    processing_time: str
+    
+    @classmethod
+    def from_tick(cls, tick_data: Any, processing_time: str) -> "TickPayload":
+        """Build a payload from a vnpy TickData-like object; missing fields are None."""
+        return cls(
+            symbol=getattr(tick_data, 'symbol', None),
+            datetime=getattr(tick_data, 'datetime', None),
+            last_price=getattr(tick_data, 'last_price', None),
+            volume=getattr(tick_data, 'volume', None),
+            last_volume=getattr(tick_data, 'last_volume', None),
+            bid_price_1=getattr(tick_data, 'bid_price_1', None),
+            ask_price_1=getattr(tick_data, 'ask_price_1', None),
+            bid_volume_1=getattr(tick_data, 'bid_volume_1', None),
+            ask_volume_1=getattr(tick_data, 'ask_volume_1', None),
+            vt_symbol=getattr(tick_data, 'vt_symbol', None),
+            processing_time=processing_time
+        )
+
+
+def _msgpack_default(value: Any) -> Any:
+    """Encode datetimes and dataclasses the way ormsgpack does natively."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if is_dataclass(value):
+        return {field.name: getattr(value, field.name) for field in fields(value)}
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+def pack_message(payload: Any) -> bytes:
+    """Serialize a payload to MessagePack, with datetimes as ISO strings and dataclasses as maps."""
+    if ORMSGPACK_AVAILABLE:
+        return ormsgpack.packb(payload, option=ormsgpack.OPT_SERIALIZE_NUMPY)
+    return msgpack.packb(payload, default=_msgpack_default)
 
 
 class ZMQPublisher:
@@ -41,25 +106,50 @@ class ZMQPublisher:
         
         # Performance monitoring
         self.publish_count = 0
-        self.serialization_times = []
-        self.last_performance_log = time.time()
+        self.dropped_count = 0
+        self._drop_warning_interval = 1000
+        self.serialization_times: deque = deque(maxlen=100)  # last 100 samples, ms
+        self.last_performance_log = time.monotonic()
         self.performance_log_interval = 30  # seconds
         
         # Performance validation
         self.performance_config = get_performance_config()
         self.environment_config = get_environment_config()
         self.performance_alerts = []
-        self.last_threshold_check = time.time()
+        self.last_threshold_check = time.monotonic()
         self.threshold_check_interval = 60  # Check thresholds every minute
         
         # Configuration
         self.port = ZMQ_SETTINGS["port"]
         self.bind_address = ZMQ_SETTINGS["bind_address"]
         self.queue_size = ZMQ_SETTINGS["queue_size"]
+        self.nodrop = ZMQ_SETTINGS["nodrop"]
+        self.io_threads = max(1, ZMQ_SETTINGS["io_threads"])
         self.enabled = ZMQ_SETTINGS["enabled"]
         
-        # Thread safety
-        self._lock = threading.RLock()
+        # Optional send batching: ticks are queued and sent in one burst once
+        # the batch is full or the oldest one has waited flush_interval. Each
+        # tick is still its own send, so this only groups sends in time; the
+        # default of 1 sends every tick inline with no added latency
+        self.batch_size = max(1, ZMQ_SETTINGS["batch_size"])
+        self.flush_interval = ZMQ_SETTINGS["flush_interval_ms"] / 1000  # seconds
+        self._pending: List[Tuple[bytes, bytes]] = []
+        self._flush_deadline = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats_task: Optional[asyncio.Task] = None
+        
+        # Encoded topic per symbol; the contract universe is small and only
+        # changes between sessions, so the cache is simply reset if it grows
+        self._topic_bytes: Dict[str, bytes] = {}
+        self._topic_cache_size = 4096
+        
+        # Thread safety: guards the socket and pending batch between gateway
+        # threads and the event loop; never acquired recursively
+        self._lock = threading.Lock()
+        
+        # Whether per-batch debug logging is on; refreshed in initialize(),
+        # after logging has been configured
+        self._debug_enabled = False
     
     async def initialize(self) -> bool:
         """
@@ -76,17 +166,24 @@ class ZMQPublisher:
                     "ZMQ Publisher starting...",
                     port=self.port,
                     bind_address=self.bind_address,
-                    queue_size=self.queue_size
+                    queue_size=self.queue_size,
+                    io_threads=self.io_threads
                 )
                 
                 # Create ZMQ context
-                self.context = zmq.Context()
+                self.context = zmq.Context(io_threads=self.io_threads)
                 
                 # Create PUB socket
                 self.socket = self.context.socket(zmq.PUB)
                 
                 # Set socket options
-                self.socket.set(zmq.SNDHWM, self.queue_size)  # High water mark
+                self.socket.set(zmq.SNDHWM, self.queue_size)  # High water mark, 0 = unbounded
+                if self.nodrop:
+                    # Fail sends with EAGAIN at the high water mark instead of
+                    # dropping silently, so lost ticks are counted. libzmq fails
+                    # the whole send if any subscriber is full, so one slow
+                    # consumer costs every subscriber that tick
+                    self.socket.set(zmq.XPUB_NODROP, 1)
                 self.socket.set(zmq.LINGER, 1000)  # Linger time for graceful shutdown
                 
                 # Bind to address
@@ -96,11 +193,20 @@ class ZMQPublisher:
                 self.is_running = True
                 self.is_connected = True
                 
+                self._debug_enabled = logging.getLogger(__name__).isEnabledFor(logging.DEBUG)
+                
+                # Ticks arrive on gateway threads; partial batches are flushed from this loop
+                self._loop = asyncio.get_running_loop()
+                
+                # Periodic performance logging runs on its own timer, off the publish path
+                self.last_performance_log = time.monotonic()
+                self._stats_task = self._loop.create_task(self._stats_loop())
+                
                 self.logger.info(
                     "ZMQ Publisher started successfully",
                     bind_address=bind_addr,
                     socket_type="PUB",
-                    timestamp=datetime.now().isoformat()
+                    timestamp=now_china().isoformat()
                 )
                 
                 return True
@@ -123,7 +229,8 @@ class ZMQPublisher:
             tick_data: Tick data object with vt_symbol attribute
             
         Returns:
-            True if published successfully, False otherwise
+            True if the tick was sent (or queued, when batching), False if it
+            was dropped or could not be published
         """
         if not self.is_running or not self.socket:
             self.logger.warning("ZMQ Publisher not running, skipping tick publication")
@@ -131,46 +238,36 @@ class ZMQPublisher:
         
         try:
             with self._lock:
-                start_time = time.time()
+                start_ns = time.perf_counter_ns()
                 
-                # Extract topic from vt_symbol
-                topic = getattr(tick_data, 'symbol', 'unknown')
-                if hasattr(tick_data, 'vt_symbol'):
-                    topic = tick_data.vt_symbol
-                elif hasattr(tick_data, 'symbol'):
-                    topic = tick_data.symbol
+                # Extract topic from vt_symbol, falling back to symbol
+                topic = getattr(tick_data, 'vt_symbol', None) or getattr(tick_data, 'symbol', 'unknown')
                 
-                # Serialize tick data using msgpack
-                tick_dict = self._serialize_tick_data(tick_data)
-                message = msgpack.packb(tick_dict)
+                # Serialize tick data to MessagePack
+                message = pack_message(TickPayload.from_tick(tick_data, now_china_iso()))
                 
                 # Calculate serialization latency
-                serialization_time = (time.time() - start_time) * 1000  # ms
+                serialization_time = (time.perf_counter_ns() - start_ns) * 1e-6  # ms
                 self.serialization_times.append(serialization_time)
                 
-                # Keep only last 100 serialization times for average calculation
-                if len(self.serialization_times) > 100:
-                    self.serialization_times = self.serialization_times[-100:]
-                
-                # Publish message with topic
-                self.socket.send_multipart([
-                    topic.encode('utf-8'),
-                    message
-                ])
-                
-                self.publish_count += 1
-                
-                # Log successful publication
-                self.logger.debug(
-                    "Tick published",
-                    topic=topic,
-                    serialization_time_ms=round(serialization_time, 2),
-                    message_size_bytes=len(message),
-                    publish_count=self.publish_count
-                )
-                
-                # Periodic performance logging
-                self._log_performance_metrics()
+                topic_bytes = self._topic_bytes.get(topic)
+                if topic_bytes is None:
+                    if len(self._topic_bytes) >= self._topic_cache_size:
+                        self._topic_bytes.clear()
+                    topic_bytes = self._topic_bytes[topic] = topic.encode('utf-8')
+                
+                # Queue message with topic; each tick stays its own
+                # [topic, payload] message so subscriber filtering is unchanged
+                self._pending.append((topic_bytes, message))
+                if len(self._pending) == 1:
+                    self._flush_deadline = time.monotonic() + self.flush_interval
+                
+                if len(self._pending) >= self.batch_size or time.monotonic() >= self._flush_deadline:
+                    return self._flush_pending()
+                if len(self._pending) == 1 and self._loop is not None:
+                    # First tick of a new batch: make sure it goes out on time
+                    # even if no further ticks arrive
+                    self._loop.call_soon_threadsafe(self._schedule_flush)
                 
                 return True
                 
@@ -186,65 +283,72 @@ class ZMQPublisher:
             self._handle_publish_failure()
             return False
     
-    def _serialize_tick_data(self, tick_data: Any) -> Dict[str, Any]:
-        """
-        Serialize tick data to dictionary format for msgpack.
-        
-        Args:
-            tick_data: Tick data object
+    def _flush_pending(self) -> bool:
+        """Send all queued messages; True if none were dropped. Caller must hold the lock."""
+        try:
+            dropped = 0
+            for topic_bytes, message in self._pending:
+                try:
+                    self.socket.send_multipart([topic_bytes, message], flags=zmq.DONTWAIT)
+                except zmq.Again:
+                    dropped += 1
             
-        Returns:
-            Dictionary representation of tick data
-        """
-        tick_dict = {}
-        
-        # Essential tick fields
-        fields = [
-            'symbol', 'datetime', 'last_price', 'volume', 'last_volume',
-            'bid_price_1', 'ask_price_1', 'bid_volume_1', 'ask_volume_1'
-        ]
-        
-        for field in fields:
-            if hasattr(tick_data, field):
-                value = getattr(tick_data, field)
-                
-                # Handle datetime serialization
-                if field == 'datetime' and hasattr(value, 'isoformat'):
-                    tick_dict[field] = value.isoformat()
-                else:
-                    tick_dict[field] = value
-        
-        # Add vt_symbol if available
-        if hasattr(tick_data, 'vt_symbol'):
-            tick_dict['vt_symbol'] = tick_data.vt_symbol
-        
-        # Add processing timestamp
-        tick_dict['processing_time'] = datetime.now().isoformat()
-        
-        return tick_dict
+            self.publish_count += len(self._pending) - dropped
+            
+            if dropped:
+                previous = self.dropped_count
+                self.dropped_count += dropped
+                # Warn on the first drop and then once per interval, not per batch
+                if previous == 0 or previous // self._drop_warning_interval != self.dropped_count // self._drop_warning_interval:
+                    self.logger.warning(
+                        "ZMQ send queue full, ticks dropped",
+                        dropped=dropped,
+                        total_dropped=self.dropped_count,
+                        sndhwm=self.queue_size
+                    )
+            
+            if self._debug_enabled:
+                self.logger.debug(
+                    "Tick batch published",
+                    batch_size=len(self._pending),
+                    publish_count=self.publish_count
+                )
+            
+            return dropped == 0
+        finally:
+            # A failed batch is dropped rather than retried
+            self._pending.clear()
+    
+    def _schedule_flush(self) -> None:
+        """Arm a flush of the current batch at its deadline; runs on the event loop."""
+        self._loop.call_later(self.flush_interval, self.flush)
+    
+    def flush(self) -> None:
+        """Send any queued ticks now."""
+        try:
+            with self._lock:
+                if self._pending and self.socket:
+                    self._flush_pending()
+        except Exception as e:
+            self.logger.error("Tick batch flush failed", error=str(e))
+            self._handle_publish_failure()
+    
+    async def _stats_loop(self) -> None:
+        """Log performance metrics every performance_log_interval seconds while running."""
+        while self.is_running:
+            await asyncio.sleep(self.performance_log_interval)
+            self._log_performance_metrics()
     
     def _log_performance_metrics(self):
         """Log ZMQ publisher performance metrics with threshold validation."""
-        current_time = time.time()
+        current_time = time.monotonic()
         
-        if current_time - self.last_performance_log >= self.performance_log_interval:
-            try:
-                # Calculate performance metrics
-                avg_serialization_time = 0.0
-                p95_serialization_time = 0.0
-                
-                if self.serialization_times:
-                    avg_serialization_time = sum(self.serialization_times) / len(self.serialization_times)
-                    
-                    # Calculate P95 serialization time
-                    sorted_times = sorted(self.serialization_times)
-                    p95_index = int(len(sorted_times) * 0.95)
-                    p95_serialization_time = sorted_times[min(p95_index, len(sorted_times) - 1)]
-                
-                # Calculate publication rate (messages per second)
-                time_window = current_time - self.last_performance_log
-                publication_rate_per_sec = (self.publish_count / time_window) if time_window > 0 else 0
-                publication_rate_per_min = publication_rate_per_sec * 60
+        try:
+            # Snapshot shared state; ticks keep arriving on gateway threads
+            with self._lock:
+                serialization_times = list(self.serialization_times)
+                publish_count = self.publish_count
+                dropped_count = self.dropped_count
                 
                 # Get queue depth
                 queue_depth = 0
@@ -253,30 +357,48 @@ class ZMQPublisher:
                         queue_depth = self.socket.get(zmq.SNDHWM) - self.socket.get(zmq.EVENTS)
                     except:
                         queue_depth = 0
+            
+            # Calculate performance metrics
+            avg_serialization_time = 0.0
+            p95_serialization_time = 0.0
+            
+            if serialization_times:
+                avg_serialization_time = sum(serialization_times) / len(serialization_times)
                 
-                # Base performance log
-                self.logger.info(
-                    "ZMQ Publisher performance metrics",
-                    total_published=self.publish_count,
-                    publication_rate_per_minute=round(publication_rate_per_min, 2),
-                    publication_rate_per_second=round(publication_rate_per_sec, 2),
-                    avg_serialization_time_ms=round(avg_serialization_time, 2),
-                    p95_serialization_time_ms=round(p95_serialization_time, 3),
-                    queue_depth_estimate=queue_depth,
-                    is_connected=self.is_connected
-                )
-                
-                # Threshold validation
-                self._validate_performance_thresholds(
-                    p95_serialization_time, 
-                    publication_rate_per_sec,
-                    current_time
-                )
-                
-                self.last_performance_log = current_time
-                
-            except Exception as e:
-                self.logger.error("ZMQ performance metrics logging failed", error=str(e))
+                # Calculate P95 serialization time
+                sorted_times = sorted(serialization_times)
+                p95_index = int(len(sorted_times) * 0.95)
+                p95_serialization_time = sorted_times[min(p95_index, len(sorted_times) - 1)]
+            
+            # Calculate publication rate (messages per second)
+            time_window = current_time - self.last_performance_log
+            publication_rate_per_sec = (publish_count / time_window) if time_window > 0 else 0
+            publication_rate_per_min = publication_rate_per_sec * 60
+            
+            # Base performance log
+            self.logger.info(
+                "ZMQ Publisher performance metrics",
+                total_published=publish_count,
+                total_dropped=dropped_count,
+                publication_rate_per_minute=round(publication_rate_per_min, 2),
+                publication_rate_per_second=round(publication_rate_per_sec, 2),
+                avg_serialization_time_ms=round(avg_serialization_time, 2),
+                p95_serialization_time_ms=round(p95_serialization_time, 3),
+                queue_depth_estimate=queue_depth,
+                is_connected=self.is_connected
+            )
+            
+            # Threshold validation
+            self._validate_performance_thresholds(
+                p95_serialization_time, 
+                publication_rate_per_sec,
+                current_time
+            )
+            
+            self.last_performance_log = current_time
+            
+        except Exception as e:
+            self.logger.error("ZMQ performance metrics logging failed", error=str(e))
     
     def _validate_performance_thresholds(self, p95_latency_ms: float, pub_rate_per_sec: float, current_time: float):
         """Validate current performance against established thresholds."""
@@ -303,7 +425,7 @@ class ZMQPublisher:
                 
                 # Track alerts
                 alert_info = {
-                    'timestamp': current_time,
+                    'timestamp': time.time(),
                     'serialization': latency_result,
                     'publication_rate': rate_result
                 }
@@ -335,26 +457,34 @@ class ZMQPublisher:
         self.logger.warning("ZMQ Publisher experiencing issues, attempting recovery")
         self.is_connected = False
         
-        # Schedule reconnection attempt
-        def delayed_reconnect():
-            time.sleep(5)  # Wait 5 seconds before retry
-            if self.is_running:
-                self.logger.info("Attempting ZMQ Publisher reconnection")
-                # In a real implementation, we might recreate the socket here
-                # For MVP, we'll just mark as connected again
-                self.is_connected = True
-        
-        threading.Thread(target=delayed_reconnect, daemon=True).start()
+        # Schedule reconnection attempt on the event loop; failures may be
+        # reported from gateway threads, so hand over thread-safely
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.call_later, 5, self._attempt_reconnect)
+    
+    def _attempt_reconnect(self):
+        """Retry after a publish failure; runs on the event loop."""
+        if self.is_running:
+            self.logger.info("Attempting ZMQ Publisher reconnection")
+            # In a real implementation, we might recreate the socket here
+            # For MVP, we'll just mark as connected again
+            self.is_connected = True
     
     async def shutdown(self):
         """Gracefully shutdown the ZMQ publisher."""
         try:
+            # Send whatever is still queued before closing the socket
+            self.flush()
+            
             with self._lock:
                 self.logger.info("ZMQ Publisher shutting down", total_published=self.publish_count)
                 
                 self.is_running = False
                 self.is_connected = False
                 
+                if self._stats_task and not self._stats_task.done():
+                    self._stats_task.cancel()
+                
                 await self._cleanup()
                 
                 # Final performance summary
@@ -365,6 +495,7 @@ class ZMQPublisher:
                 self.logger.info(
                     "ZMQ Publisher shutdown complete",
                     final_publish_count=self.publish_count,
+                    final_dropped_count=self.dropped_count,
                     final_avg_serialization_time_ms=round(avg_serialization_time, 2)
                 )
                 
@@ -4,52 +4,65 @@
 
 import logging
 import os
+import re
 from typing import Dict, Any
 
 
-def setup_optimized_logging() -> Dict[str, Any]:
-    """
-    设置优化的日志配置，减少启动时的信息刷屏
-    """
-    
-    # 环境变量控制调试级别
-    debug_mode = os.getenv("GATEWAY_DEBUG_MODE", "false").lower() == "true"
+# VNPy相关的库日志级别设置为WARNING，减少详细输出
+_VNPY_LOGGERS = (
+    "vnpy",
+    "vnpy.trader",
+    "vnpy.event", 
+    "vnpy_ctp",
+    "vnpy_sopt",
+    "ctp",
+    "sopt"
+)
+
+# 系统资源监控相关库日志级别设置
+_SYSTEM_LOGGERS = (
+    "psutil",
+    "subprocess",
+    "urllib3",
+    "requests"
+)
+
+_FORMATTERS = {
+    "detailed": {
+        "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        "datefmt": "%Y-%m-%d %H:%M:%S"
+    },
+    "simple": {
+        "format": "%(levelname)s - %(name)s - %(message)s"
+    },
+    "minimal": {
+        "format": "%(message)s"
+    }
+}
+
+
+def _build_logging_config(debug_mode: bool) -> Dict[str, Any]:
+    """构建指定模式下的日志配置"""
     log_level = "DEBUG" if debug_mode else "INFO"
+    library_handlers = ["console", "file"] if debug_mode else ["file"]
     
-    # VNPy相关的库日志级别设置为WARNING，减少详细输出
-    vnpy_loggers = [
-        "vnpy",
-        "vnpy.trader",
-        "vnpy.event", 
-        "vnpy_ctp",
-        "vnpy_sopt",
-        "ctp",
-        "sopt"
-    ]
-    
-    # 系统资源监控相关库日志级别设置
-    system_loggers = [
-        "psutil",
-        "subprocess",
-        "urllib3",
-        "requests"
-    ]
+    # VNPy相关日志 - 只显示WARNING及以上
+    vnpy_entry = {
+        "level": "WARNING",
+        "handlers": library_handlers,
+        "propagate": False
+    }
+    # 系统监控日志 - 只在调试模式显示
+    system_entry = {
+        "level": "WARNING" if debug_mode else "ERROR",
+        "handlers": library_handlers,
+        "propagate": False
+    }
     
-    config = {
+    return {
         "version": 1,
         "disable_existing_loggers": False,
-        "formatters": {
-            "detailed": {
-                "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-                "datefmt": "%Y-%m-%d %H:%M:%S"
-            },
-            "simple": {
-                "format": "%(levelname)s - %(name)s - %(message)s"
-            },
-            "minimal": {
-                "format": "%(message)s"
-            }
-        },
+        "formatters": _FORMATTERS,
         "handlers": {
             "console": {
                 "class": "logging.StreamHandler",
@@ -72,18 +85,8 @@ def setup_optimized_logging() -> Dict[str, Any]:
                 "handlers": ["console", "file"],
                 "propagate": False
             },
-            # VNPy相关日志 - 只显示WARNING及以上
-            **{logger_name: {
-                "level": "WARNING",
-                "handlers": ["file"] if not debug_mode else ["console", "file"],
-                "propagate": False
-            } for logger_name in vnpy_loggers},
-            # 系统监控日志 - 只在调试模式显示
-            **{logger_name: {
-                "level": "ERROR" if not debug_mode else "WARNING", 
-                "handlers": ["file"] if not debug_mode else ["console", "file"],
-                "propagate": False
-            } for logger_name in system_loggers},
+            **{logger_name: vnpy_entry for logger_name in _VNPY_LOGGERS},
+            **{logger_name: system_entry for logger_name in _SYSTEM_LOGGERS},
             # uvicorn日志优化
             "uvicorn": {
                 "level": "INFO",
@@ -101,8 +104,51 @@ def setup_optimized_logging() -> Dict[str, Any]:
             "handlers": ["console"]
         }
     }
+
+
+# 两种模式的配置在导入时构建一次
+_LOGGING_CONFIGS = {
+    False: _build_logging_config(debug_mode=False),
+    True: _build_logging_config(debug_mode=True)
+}
+
+
+def setup_optimized_logging() -> Dict[str, Any]:
+    """
+    设置优化的日志配置，减少启动时的信息刷屏
+    
+    直接返回预构建的配置；logging.config.dictConfig 不会修改传入的字典，调用方也不应修改它
+    """
     
-    return config
+    # 环境变量控制调试级别
+    debug_mode = os.getenv("GATEWAY_DEBUG_MODE", "false").lower() == "true"
+    
+    return _LOGGING_CONFIGS[debug_mode]
+
+
+# 关键状态变化关键词
+_CRITICAL_PATTERNS = (
+    "连接成功", "连接失败", "登录成功", "登录失败", 
+    "授权验证成功", "授权验证失败", "断开连接",
+    "connected", "disconnected", "login", "authentication",
+    "网关连接成功事件", "交易服务器连接成功事件"
+)
+
+# 需要过滤的详细信息
+_FILTER_PATTERNS = (
+    "修正交易服务器地址", "修正行情服务器地址", "服务器地址",
+    "用户名:", "经纪商代码:", "创建行情API对象", "行情数据目录",
+    "注册前端服务器", "初始化行情API", "初始化查询任务",
+    "CtpMdApi.connect() 开始连接", "CtpMdApi.connect() 完成",
+    "发送登录请求", "登录请求结果", "CtpGateway.connect() 执行完成"
+)
+
+# 每组关键词编译为一个正则，一次扫描即可判断是否包含任一关键词
+_CRITICAL_RE = re.compile("|".join(map(re.escape, _CRITICAL_PATTERNS)))
+_FILTER_RE = re.compile("|".join(map(re.escape, _FILTER_PATTERNS)))
+
+# 环境变量在运行期间不会变化，导入时读取一次
+_GATEWAY_DEBUG_MODE = os.getenv("GATEWAY_DEBUG_MODE", "false").lower() == "true"
 
 
 def filter_vnpy_logs(record: logging.LogRecord) -> bool:
@@ -111,43 +157,24 @@ def filter_vnpy_logs(record: logging.LogRecord) -> bool:
     """
     if not hasattr(record, 'getMessage'):
         return True
-        
-    message = record.getMessage()
-    
-    # 关键状态变化关键词
-    critical_patterns = [
-        "连接成功", "连接失败", "登录成功", "登录失败", 
-        "授权验证成功", "授权验证失败", "断开连接",
-        "connected", "disconnected", "login", "authentication",
-        "网关连接成功事件", "交易服务器连接成功事件"
-    ]
-    
-    # 需要过滤的详细信息
-    filter_patterns = [
-        "修正交易服务器地址", "修正行情服务器地址", "服务器地址",
-        "用户名:", "经纪商代码:", "创建行情API对象", "行情数据目录",
-        "注册前端服务器", "初始化行情API", "初始化查询任务",
-        "CtpMdApi.connect() 开始连接", "CtpMdApi.connect() 完成",
-        "发送登录请求", "登录请求结果", "CtpGateway.connect() 执行完成"
-    ]
     
     # 错误级别始终显示
     if record.levelno >= logging.ERROR:
         return True
         
     # 调试模式显示所有
-    if os.getenv("GATEWAY_DEBUG_MODE", "false").lower() == "true":
+    if _GATEWAY_DEBUG_MODE:
         return True
-        
+    
+    message = record.getMessage()
+    
     # 检查是否包含关键信息
-    for pattern in critical_patterns:
-        if pattern in message:
-            return True
+    if _CRITICAL_RE.search(message):
+        return True
             
     # 过滤详细信息
-    for pattern in filter_patterns:
-        if pattern in message:
-            return False
+    if _FILTER_RE.search(message):
+        return False
             
     return True
 
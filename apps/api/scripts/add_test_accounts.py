@@ -110,6 +110,7 @@ def create_account_record(account_data, priority=1):
     
     # Create unique account ID by combining name, broker and gateway type
     unique_id = f"{account_data['name']}-{account_data['broker']}-{gateway_type}"
+    now = datetime.now().isoformat()
     
     return {
         "id": unique_id,
@@ -118,8 +119,8 @@ def create_account_record(account_data, priority=1):
         "priority": priority,
         "is_enabled": True,
         "description": f"{account_data['broker']} - {account_data['market']} ({gateway_type})",
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat()
+        "created_at": now,
+        "updated_at": now
     }
 
 def add_accounts_to_db():
@@ -140,6 +141,7 @@ def add_accounts_to_db():
         print(json.dumps(get_sample_account_structure(), indent=2, ensure_ascii=False))
         return False
     
+    conn = None
     try:
         # Connect to database
         conn = sqlite3.connect(db_path)
@@ -156,22 +158,24 @@ def add_accounts_to_db():
             print("Please run database migrations first.")
             return False
         
-        # Insert test accounts
+        # Per-row fsync is unnecessary for a one-off seed; the default rollback
+        # journal is kept since the API server shares this database file
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        
+        # Look up existing ids once instead of querying per account
+        cursor.execute("SELECT id FROM market_data_accounts")
+        existing_ids = {row[0] for row in cursor.fetchall()}
+        
+        rows = []
         for i, account_data in enumerate(test_accounts, 1):
             record = create_account_record(account_data, priority=i)
             
-            # Check if account already exists
-            cursor.execute("SELECT id FROM market_data_accounts WHERE id = ?", (record["id"],))
-            if cursor.fetchone():
+            if record["id"] in existing_ids:
                 print(f"Account '{record['id']}' already exists, skipping...")
                 continue
+            existing_ids.add(record["id"])
             
-            # Insert new account
-            cursor.execute("""
-                INSERT INTO market_data_accounts 
-                (id, gateway_type, settings, priority, is_enabled, description, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            rows.append((
                 record["id"],
                 record["gateway_type"],
                 record["settings"],
@@ -181,9 +185,15 @@ def add_accounts_to_db():
                 record["created_at"],
                 record["updated_at"]
             ))
-            
             print(f"Added account: {record['id']}")
         
+        # Insert all new accounts in a single statement
+        cursor.executemany("""
+            INSERT OR IGNORE INTO market_data_accounts 
+            (id, gateway_type, settings, priority, is_enabled, description, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        
         # Commit changes
         conn.commit()
         print("Successfully added test accounts to database!")
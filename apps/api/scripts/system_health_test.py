@@ -4,212 +4,270 @@ Market Data Hub System Health Test Script
 Comprehensive testing of all system components in development environment
 """
 
+import argparse
 import asyncio
+import importlib
 import os
 import sys
+import time
 from pathlib import Path
 
+# uvloop is optional: it is unavailable on Windows
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 # Add the app directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.services.database_service import DatabaseService
-from app.services.gateway_manager import GatewayManager
-from app.services.health_monitor import HealthMonitor
-from app.services.websocket_manager import WebSocketManager
-from app.services.zmq_publisher import ZMQPublisher
-from app.services.event_bus import event_bus
+
+# Output is collected per test and written in one call
+_LINES: list[str] = []
+
+
+def report(line: str) -> None:
+    """Queue a line of output."""
+    _LINES.append(line)
+
+
+def flush_report() -> None:
+    """Write all queued output at once."""
+    if _LINES:
+        sys.stdout.write("\n".join(_LINES) + "\n")
+        sys.stdout.flush()
+        _LINES.clear()
+
+
+def import_service(module_name: str, attr: str):
+    """Import a service lazily so only the selected tests pay for their imports."""
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    report(f"   ⏱️  Imported {module_name} in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return getattr(module, attr)
 
 
 async def test_database_service():
     """Test database service functionality"""
-    print("\n🗄️  Testing Database Service...")
+    report("\n🗄️  Testing Database Service...")
     
     try:
+        DatabaseService = import_service("app.services.database_service", "DatabaseService")
         db = DatabaseService()
-        print("   ✅ Database Service initialized")
+        report("   ✅ Database Service initialized")
         
         # Test database operations
         accounts = await db.get_all_accounts()
-        print(f"   ✅ Database query successful: {len(accounts)} accounts found")
+        report(f"   ✅ Database query successful: {len(accounts)} accounts found")
         
         if accounts:
-            print("   📊 Account Details:")
+            report("   📊 Account Details:")
             for account in accounts:
-                print(f"     - {account.gateway_name}: {account.status} ({account.account_id})")
+                report(f"     - {account.gateway_name}: {account.status} ({account.account_id})")
         else:
-            print("   ℹ️  No accounts found in database")
+            report("   ℹ️  No accounts found in database")
             
         return True
         
     except Exception as e:
-        print(f"   ❌ Database Service Error: {e}")
+        report(f"   ❌ Database Service Error: {e}")
         return False
 
 
 def test_gateway_manager():
     """Test gateway manager functionality"""
-    print("\n🌐 Testing Gateway Manager...")
+    report("\n🌐 Testing Gateway Manager...")
     
     try:
+        GatewayManager = import_service("app.services.gateway_manager", "GatewayManager")
         gateway_mgr = GatewayManager()
-        print("   ✅ Gateway Manager initialized")
+        report("   ✅ Gateway Manager initialized")
         
         # Test gateway operations
         account_status = gateway_mgr.get_account_status()
-        print(f"   ✅ Account status query successful")
-        print(f"   📊 Total accounts: {account_status.get('total_accounts', 0)}")
-        print(f"   📊 Connected accounts: {account_status.get('connected_accounts', 0)}")
+        report(f"   ✅ Account status query successful")
+        report(f"   📊 Total accounts: {account_status.get('total_accounts', 0)}")
+        report(f"   📊 Connected accounts: {account_status.get('connected_accounts', 0)}")
         
         accounts = account_status.get('accounts', [])
         if accounts:
-            print("   📊 Account Details:")
+            report("   📊 Account Details:")
             for account in accounts:
-                print(f"     - {account.get('gateway_name', 'Unknown')}: {account.get('status', 'Unknown')}")
+                report(f"     - {account.get('gateway_name', 'Unknown')}: {account.get('status', 'Unknown')}")
         else:
-            print("   ℹ️  No active accounts found")
+            report("   ℹ️  No active accounts found")
             
         return True
         
     except Exception as e:
-        print(f"   ❌ Gateway Manager Error: {e}")
+        report(f"   ❌ Gateway Manager Error: {e}")
         return False
 
 
 def test_health_monitor():
     """Test health monitor functionality"""
-    print("\n💓 Testing Health Monitor...")
+    report("\n💓 Testing Health Monitor...")
     
     try:
+        HealthMonitor = import_service("app.services.health_monitor", "HealthMonitor")
         health_monitor = HealthMonitor()
-        print("   ✅ Health Monitor initialized")
-        print(f"   ⏱️  Check Interval: {health_monitor.health_check_interval}s")
-        print(f"   🎯 CTP Canary Contracts: {health_monitor.ctp_canary_contracts}")
-        print(f"   🎯 SOPT Canary Contracts: {health_monitor.sopt_canary_contracts}")
+        report("   ✅ Health Monitor initialized")
+        report(f"   ⏱️  Check Interval: {health_monitor.health_check_interval}s")
+        report(f"   🎯 CTP Canary Contracts: {health_monitor.ctp_canary_contracts}")
+        report(f"   🎯 SOPT Canary Contracts: {health_monitor.sopt_canary_contracts}")
         
         return True
         
     except Exception as e:
-        print(f"   ❌ Health Monitor Error: {e}")
+        report(f"   ❌ Health Monitor Error: {e}")
         return False
 
 
 def test_websocket_manager():
     """Test WebSocket manager functionality"""
-    print("\n🔌 Testing WebSocket Manager...")
+    report("\n🔌 Testing WebSocket Manager...")
     
     try:
+        WebSocketManager = import_service("app.services.websocket_manager", "WebSocketManager")
         ws_manager = WebSocketManager()
-        print("   ✅ WebSocket Manager initialized")
-        print(f"   👤 Active connections: {len(ws_manager.active_connections)}")
+        report("   ✅ WebSocket Manager initialized")
+        report(f"   👤 Active connections: {len(ws_manager.active_connections)}")
         
         return True
         
     except Exception as e:
-        print(f"   ❌ WebSocket Manager Error: {e}")
+        report(f"   ❌ WebSocket Manager Error: {e}")
         return False
 
 
 def test_zmq_publisher():
     """Test ZMQ publisher functionality"""
-    print("\n📡 Testing ZMQ Publisher...")
+    report("\n📡 Testing ZMQ Publisher...")
     
     try:
+        ZMQPublisher = import_service("app.services.zmq_publisher", "ZMQPublisher")
         zmq_pub = ZMQPublisher()
-        print("   ✅ ZMQ Publisher initialized")
+        report("   ✅ ZMQ Publisher initialized")
         
         return True
         
     except Exception as e:
-        print(f"   ❌ ZMQ Publisher Error: {e}")
+        report(f"   ❌ ZMQ Publisher Error: {e}")
         return False
 
 
 def test_environment_config():
     """Test environment configuration"""
-    print("\n⚙️  Testing Environment Configuration...")
+    report("\n⚙️  Testing Environment Configuration...")
     
     # Load environment variables from .env file
     env_file = Path(__file__).parent.parent / ".env"
     if env_file.exists():
-        print(f"   ✅ Environment file found: {env_file}")
+        report(f"   ✅ Environment file found: {env_file}")
         
-        # Read and display key configuration
-        with open(env_file, 'r') as f:
-            lines = f.readlines()
-            
-        config = {}
-        for line in lines:
-            line = line.strip()
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                config[key] = value
-        
-        print("   📋 Key Configuration:")
-        important_keys = [
+        important_keys = (
             'ENVIRONMENT', 'ENABLE_CTP_GATEWAY', 'ENABLE_CTP_MOCK',
             'ENABLE_DATABASE', 'DATABASE_URL', 'ENABLE_ZMQ_PUBLISHER'
-        ]
+        )
+        wanted = frozenset(important_keys)
         
-        for key in important_keys:
-            value = config.get(key, 'Not set')
-            print(f"     - {key}: {value}")
+        # Stream the file once, keeping only the keys we display
+        config = {}
+        with open(env_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                key, sep, value = line.partition('=')
+                if sep and key in wanted:
+                    config[key] = value
+        
+        report("   📋 Key Configuration:")
+        report("\n".join(f"     - {key}: {config.get(key, 'Not set')}" for key in important_keys))
             
         return True
     else:
-        print(f"   ❌ Environment file not found: {env_file}")
+        report(f"   ❌ Environment file not found: {env_file}")
         return False
 
 
 def test_event_bus():
     """Test event bus functionality"""
-    print("\n🚌 Testing Event Bus...")
+    report("\n🚌 Testing Event Bus...")
     
     try:
+        event_bus = import_service("app.services.event_bus", "event_bus")
+        
         # Test event bus operations
-        print("   ✅ Event Bus accessible")
-        print(f"   📊 Event Bus type: {type(event_bus)}")
+        report("   ✅ Event Bus accessible")
+        report(f"   📊 Event Bus type: {type(event_bus)}")
         
         return True
         
     except Exception as e:
-        print(f"   ❌ Event Bus Error: {e}")
+        report(f"   ❌ Event Bus Error: {e}")
         return False
 
 
-async def main():
+# Tests by name, in run order
+TESTS = {
+    "env": test_environment_config,
+    "db": test_database_service,
+    "gateway": test_gateway_manager,
+    "health": test_health_monitor,
+    "websocket": test_websocket_manager,
+    "zmq": test_zmq_publisher,
+    "event_bus": test_event_bus,
+}
+
+
+async def main(only=None):
     """Run comprehensive system health test"""
-    print("🚀 Market Data Hub System Health Test")
-    print("=" * 50)
+    report("🚀 Market Data Hub System Health Test")
+    report("=" * 50)
+    flush_report()
     
     test_results = []
     
-    # Test all components
-    test_results.append(test_environment_config())
-    test_results.append(await test_database_service())
-    test_results.append(test_gateway_manager())
-    test_results.append(test_health_monitor())
-    test_results.append(test_websocket_manager())
-    test_results.append(test_zmq_publisher())
-    test_results.append(test_event_bus())
+    # Test the selected components, or all of them
+    for name, test in TESTS.items():
+        if only and name not in only:
+            continue
+        result = test()
+        if asyncio.iscoroutine(result):
+            result = await result
+        test_results.append(result)
+        flush_report()
     
     # Summary
-    print("\n" + "=" * 50)
-    print("📊 Test Summary:")
+    report("\n" + "=" * 50)
+    report("📊 Test Summary:")
     
     passed = sum(test_results)
     total = len(test_results)
     
-    print(f"   ✅ Tests Passed: {passed}/{total}")
+    report(f"   ✅ Tests Passed: {passed}/{total}")
     
     if passed == total:
-        print("   🎉 All tests passed! System is healthy and ready.")
-        return True
+        report("   🎉 All tests passed! System is healthy and ready.")
     else:
-        print(f"   ⚠️  {total - passed} test(s) failed. Please check the errors above.")
-        return False
+        report(f"   ⚠️  {total - passed} test(s) failed. Please check the errors above.")
+    
+    flush_report()
+    return passed == total
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Market Data Hub system health test")
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=list(TESTS),
+        help="Run only these tests (default: all)"
+    )
+    args = parser.parse_args()
+    
     # Run the test
-    success = asyncio.run(main())
+    success = asyncio.run(main(args.only), loop_factory=uvloop.new_event_loop if UVLOOP_AVAILABLE else None)
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -10,10 +10,50 @@ import asyncio
 import json
 import sys
 import argparse
-from datetime import datetime
+from datetime import datetime, timezone
+import orjson
 import websockets
 from typing import Optional
 
+# uvloop is optional: it is unavailable on Windows
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+
+def format_message(data: dict) -> str:
+    """Format a single event for display."""
+    event_type = data.get("event_type") or data.get("type", "unknown")
+    timestamp = data.get("timestamp", "")
+    
+    lines = [f"\n[{timestamp}] {event_type.upper()}"]
+    
+    if event_type == "gateway_status_change":
+        lines.append(f"  Gateway: {data.get('gateway_id')}")
+        lines.append(f"  Status: {data.get('previous_status')} → {data.get('current_status')}")
+    
+    elif event_type == "system_log":
+        lines.append(f"  Level: {data.get('level')}")
+        lines.append(f"  Source: {data.get('source')}")
+        lines.append(f"  Message: {data.get('message')}")
+    
+    elif event_type == "gateway_recovery_status":
+        lines.append(f"  Gateway: {data.get('gateway_id')}")
+        lines.append(f"  Status: {data.get('recovery_status')}")
+        lines.append(f"  Attempt: {data.get('attempt')}")
+    
+    elif event_type == "pong":
+        lines.append("  ✓ Received pong response")
+    
+    else:
+        # Print full message for unknown types
+        lines.append(f"  Data: {json.dumps(data, indent=2)}")
+    
+    lines.append("-" * 50)
+    return "\n".join(lines) + "\n"
+
 
 async def test_websocket_connection(url: str, token: Optional[str] = None):
     """Test WebSocket connection and message handling."""
@@ -25,23 +65,25 @@ async def test_websocket_connection(url: str, token: Optional[str] = None):
     print(f"Connecting to: {url}")
     
     try:
-        async with websockets.connect(url) as websocket:
+        # Event batches can be large; frames are small JSON, so skip deflate
+        async with websockets.connect(url, max_size=2**22, compression=None) as websocket:
             print("✓ Connected successfully!")
             
             # Receive initial connection message
             message = await websocket.recv()
-            data = json.loads(message)
+            data = orjson.loads(message)
             print(f"✓ Received connection message: {data}")
             
             if data.get("event_type") == "connection" and data.get("client_id"):
                 print(f"  Client ID: {data['client_id']}")
             
             # Send a ping message
-            ping_message = {
+            # Sent as a text frame: the server reads client messages with receive_text()
+            ping_message = orjson.dumps({
                 "type": "ping",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            await websocket.send(json.dumps(ping_message))
+                "timestamp": datetime.now(timezone.utc)
+            }).decode()
+            await websocket.send(ping_message)
             print(f"✓ Sent ping: {ping_message}")
             
             # Set up message listener
@@ -51,36 +93,16 @@ async def test_websocket_connection(url: str, token: Optional[str] = None):
             try:
                 while True:
                     message = await asyncio.wait_for(websocket.recv(), timeout=60.0)
-                    data = json.loads(message)
-                    
-                    # Format and display message
-                    event_type = data.get("event_type") or data.get("type", "unknown")
-                    timestamp = data.get("timestamp", "")
-                    
-                    print(f"\n[{timestamp}] {event_type.upper()}")
-                    
-                    if event_type == "gateway_status_change":
-                        print(f"  Gateway: {data.get('gateway_id')}")
-                        print(f"  Status: {data.get('previous_status')} → {data.get('current_status')}")
-                    
-                    elif event_type == "system_log":
-                        print(f"  Level: {data.get('level')}")
-                        print(f"  Source: {data.get('source')}")
-                        print(f"  Message: {data.get('message')}")
-                    
-                    elif event_type == "gateway_recovery_status":
-                        print(f"  Gateway: {data.get('gateway_id')}")
-                        print(f"  Status: {data.get('recovery_status')}")
-                        print(f"  Attempt: {data.get('attempt')}")
-                    
-                    elif event_type == "pong":
-                        print("  ✓ Received pong response")
+                    data = orjson.loads(message)
                     
+                    # The server coalesces bursts into event_batch frames
+                    if data.get("event_type") == "event_batch":
+                        events = data.get("events", [])
                     else:
-                        # Print full message for unknown types
-                        print(f"  Data: {json.dumps(data, indent=2)}")
+                        events = [data]
                     
-                    print("-" * 50)
+                    # One write per frame rather than one per line
+                    print("".join(map(format_message, events)), end="")
                     
             except asyncio.TimeoutError:
                 print("\nNo messages received for 60 seconds")
@@ -132,7 +154,10 @@ def main():
     
     # Run the test
     token = None if args.no_token else args.token
-    asyncio.run(test_websocket_connection(args.url, token))
+    asyncio.run(
+        test_websocket_connection(args.url, token),
+        loop_factory=uvloop.new_event_loop if UVLOOP_AVAILABLE else None
+    )
 
 
 if __name__ == "__main__":
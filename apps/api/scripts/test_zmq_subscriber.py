@@ -21,14 +21,36 @@ Examples:
 """
 
 import argparse
+import heapq
 import signal
 import sys
-import time
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional, Dict, Any
 import zmq
 import msgpack
 
+# Prefer the Rust MessagePack decoder when installed; the publisher's wire
+# format is plain MessagePack, so msgpack decodes it just the same
+try:
+    import ormsgpack
+    ORMSGPACK_AVAILABLE = True
+except ImportError:
+    ORMSGPACK_AVAILABLE = False
+
+
+def unpack_message(message_data: bytes) -> Any:
+    """Deserialize a MessagePack payload with str keys and values."""
+    if ORMSGPACK_AVAILABLE:
+        return ormsgpack.unpackb(message_data)
+    return msgpack.unpackb(message_data, raw=False)
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO timestamp; ticks within the same millisecond share one string."""
+    return datetime.fromisoformat(value)
+
 
 class ZMQTestSubscriber:
     """Test subscriber for validating ZMQ tick data distribution."""
@@ -43,8 +65,13 @@ class ZMQTestSubscriber:
         self.start_time: Optional[datetime] = None
         
         # Statistics
-        self.topics_received = set()
-        self.latencies = []
+        self.topics_received: Dict[str, int] = {}  # topic -> message count
+        
+        # Running latency stats; constant memory however long the subscriber runs
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.latency_min = float('inf')
+        self.latency_max = float('-inf')
         
     def connect(self) -> bool:
         """
@@ -56,16 +83,20 @@ class ZMQTestSubscriber:
         try:
             print(f"Connecting to ZMQ publisher at tcp://{self.host}:{self.port}")
             
-            # Create ZMQ context and socket
-            self.context = zmq.Context()
+            # Create socket on the process-wide context, shared by all subscribers
+            self.context = zmq.Context.instance()
             self.socket = self.context.socket(zmq.SUB)
             
+            # Set socket options; queue limits only apply to connections made after them
+            self.socket.setsockopt(zmq.RCVTIMEO, 5000)  # 5 second timeout
+            self.socket.setsockopt(zmq.RCVHWM, 100000)  # Absorb bursts instead of dropping at 1000
+            self.socket.setsockopt(zmq.RCVBUF, 4 * 1024 * 1024)  # Kernel receive buffer
+            self.socket.setsockopt(zmq.LINGER, 0)  # Don't block on close
+            self.socket.setsockopt(zmq.TCP_KEEPALIVE, 1)
+            
             # Connect to publisher
             self.socket.connect(f"tcp://{self.host}:{self.port}")
             
-            # Set socket options
-            self.socket.setsockopt(zmq.RCVTIMEO, 5000)  # 5 second timeout
-            
             print("Connected successfully!")
             return True
             
@@ -122,8 +153,8 @@ class ZMQTestSubscriber:
                         print(f"\nReached maximum message count ({max_messages}). Stopping...")
                         break
                     
-                    # Receive message with timeout
-                    message_parts = self.socket.recv_multipart(zmq.NOBLOCK)
+                    # Block until a message arrives or RCVTIMEO expires
+                    message_parts = self.socket.recv_multipart()
                     
                     if len(message_parts) >= 2:
                         topic = message_parts[0].decode('utf-8')
@@ -134,7 +165,6 @@ class ZMQTestSubscriber:
                     
                 except zmq.Again:
                     # Timeout - no message received
-                    time.sleep(0.1)
                     continue
                     
                 except zmq.ZMQError as e:
@@ -156,43 +186,52 @@ class ZMQTestSubscriber:
             message_data: Serialized message data
         """
         try:
-            # Deserialize message using msgpack
-            tick_data = msgpack.unpackb(message_data, raw=False)
+            # Deserialize message
+            tick_data = unpack_message(message_data)
             
             # Track statistics
             self.message_count += 1
-            self.topics_received.add(topic)
+            self.topics_received[topic] = self.topics_received.get(topic, 0) + 1
             
             # Calculate latency if processing_time is available
             latency_ms = None
             if 'processing_time' in tick_data:
                 try:
-                    processing_time = datetime.fromisoformat(tick_data['processing_time'].replace('Z', '+00:00'))
-                    current_time = datetime.now()
+                    processing_time = _parse_iso(tick_data['processing_time'])
+                    current_time = datetime.now(processing_time.tzinfo)
                     latency_ms = (current_time - processing_time).total_seconds() * 1000
-                    self.latencies.append(latency_ms)
+                    self.latency_count += 1
+                    self.latency_sum += latency_ms
+                    if latency_ms < self.latency_min:
+                        self.latency_min = latency_ms
+                    if latency_ms > self.latency_max:
+                        self.latency_max = latency_ms
                 except:
                     pass  # Ignore latency calculation errors
             
             # Validate tick data format
             validation_result = self._validate_tick_data(tick_data)
             
-            # Print message summary
-            print(f"[{self.message_count:04d}] Topic: {topic}")
-            print(f"       Symbol: {tick_data.get('symbol', 'N/A')}")
-            print(f"       Price: {tick_data.get('last_price', 'N/A')}")
-            print(f"       Volume: {tick_data.get('volume', 'N/A')}")
-            print(f"       Time: {tick_data.get('datetime', 'N/A')}")
+            # Build the summary and write it in one call; separate print()
+            # calls each flush a line to the terminal
+            lines = [
+                f"[{self.message_count:04d}] Topic: {topic}",
+                f"       Symbol: {tick_data.get('symbol', 'N/A')}",
+                f"       Price: {tick_data.get('last_price', 'N/A')}",
+                f"       Volume: {tick_data.get('volume', 'N/A')}",
+                f"       Time: {tick_data.get('datetime', 'N/A')}",
+            ]
             
             if latency_ms is not None:
-                print(f"       Latency: {latency_ms:.2f}ms")
+                lines.append(f"       Latency: {latency_ms:.2f}ms")
             
             if not validation_result['valid']:
-                print(f"       ⚠️  Validation Issues: {', '.join(validation_result['issues'])}")
+                lines.append(f"       ⚠️  Validation Issues: {', '.join(validation_result['issues'])}")
             else:
-                print(f"       ✅ Data Valid")
+                lines.append(f"       ✅ Data Valid")
             
-            print()
+            lines.append("\n")
+            sys.stdout.write("\n".join(lines))
             
         except Exception as e:
             print(f"Error processing message: {e}")
@@ -239,7 +278,7 @@ class ZMQTestSubscriber:
         if 'datetime' in tick_data:
             try:
                 if isinstance(tick_data['datetime'], str):
-                    datetime.fromisoformat(tick_data['datetime'].replace('Z', '+00:00'))
+                    _parse_iso(tick_data['datetime'])
             except:
                 issues.append("Invalid datetime format")
         
@@ -256,9 +295,8 @@ class ZMQTestSubscriber:
             self.socket.close()
             self.socket = None
         
-        if self.context:
-            self.context.term()
-            self.context = None
+        # The shared context is left running for other subscribers in the process
+        self.context = None
     
     def _print_statistics(self) -> None:
         """Print subscription statistics."""
@@ -272,20 +310,25 @@ class ZMQTestSubscriber:
         print("="*60)
         print(f"Total Messages Received: {self.message_count}")
         print(f"Unique Topics: {len(self.topics_received)}")
-        print(f"Topics Received: {', '.join(sorted(self.topics_received)) if self.topics_received else 'None'}")
+        if not self.topics_received:
+            print("Topics Received: None")
+        elif len(self.topics_received) <= 100:
+            print(f"Topics Received: {', '.join(sorted(self.topics_received))}")
+        else:
+            # Too many to list; show the busiest ones
+            busiest = heapq.nlargest(10, self.topics_received.items(), key=lambda item: item[1])
+            print(f"Busiest Topics: {', '.join(f'{topic} ({count})' for topic, count in busiest)}")
         print(f"Duration: {duration:.2f} seconds")
         
         if self.message_count > 0 and duration > 0:
             rate = self.message_count / duration
             print(f"Average Rate: {rate:.2f} messages/second")
         
-        if self.latencies:
-            avg_latency = sum(self.latencies) / len(self.latencies)
-            min_latency = min(self.latencies)
-            max_latency = max(self.latencies)
+        if self.latency_count:
+            avg_latency = self.latency_sum / self.latency_count
             print(f"Average Latency: {avg_latency:.2f}ms")
-            print(f"Min Latency: {min_latency:.2f}ms")
-            print(f"Max Latency: {max_latency:.2f}ms")
+            print(f"Min Latency: {self.latency_min:.2f}ms")
+            print(f"Max Latency: {self.latency_max:.2f}ms")
         
         print("="*60)
 
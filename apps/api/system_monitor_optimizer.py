@@ -6,9 +6,34 @@ import os
 import sys
 import subprocess
 import logging
+import re
+import warnings
 from contextlib import contextmanager
 from typing import Optional
 
+# 系统资源警告关键词，编译为一个正则，一次扫描即可判断
+_NOISE_PATTERNS = (
+    'Resource temporarily unavailable',
+    'Permission denied',
+    'No such file or directory',
+    'docker0:', 'br-', 'virbr',
+    'should run this program as super-user'
+)
+_NOISE_RE = re.compile("|".join(map(re.escape, _NOISE_PATTERNS)))
+
+# 需要从系统工具输出中过滤的网络警告模式
+_NETWORK_WARNING_PATTERNS = (
+    'docker0: Resource temporarily unavailable',
+    'br-', 'virbr0', 'virbr1',
+    'No such file or directory',
+    'Permission denied',
+    'WARNING: you should run this program as super-user',
+    'WARNING: output may be incomplete or inaccurate',
+    '/sys/firmware/dmi/tables/smbios_entry_point',
+    "Can't read memory from /dev/mem"
+)
+_NETWORK_WARNING_RE = re.compile("|".join(map(re.escape, _NETWORK_WARNING_PATTERNS)))
+
 
 class SystemMonitorOptimizer:
     """
@@ -17,42 +42,18 @@ class SystemMonitorOptimizer:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.original_env = {}
         
     @contextmanager
     def suppress_system_warnings(self):
         """
         上下文管理器：临时抑制系统警告
         """
-        # 保存原始环境变量
-        env_vars_to_modify = [
-            'PYTHONWARNINGS',
-            'PSUTIL_TESTING',
-        ]
-        
-        for var in env_vars_to_modify:
-            self.original_env[var] = os.environ.get(var)
-        
-        try:
-            # 设置环境变量以减少警告
-            os.environ['PYTHONWARNINGS'] = 'ignore::UserWarning,ignore::DeprecationWarning'
-            os.environ['PSUTIL_TESTING'] = '1'  # 减少psutil的一些系统检查
-            
-            # 重定向标准错误流以捕获系统工具警告
-            original_stderr = sys.stderr
-            
+        # 只修改进程内的警告过滤器；环境变量已在 apply_optimizations 中一次性设置，
+        # 这里不再逐次写入 os.environ
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            warnings.simplefilter("ignore", DeprecationWarning)
             yield
-            
-        finally:
-            # 恢复原始环境变量
-            for var, original_value in self.original_env.items():
-                if original_value is None:
-                    os.environ.pop(var, None)
-                else:
-                    os.environ[var] = original_value
-            
-            # 恢复标准错误流
-            sys.stderr = original_stderr
     
     def optimize_psutil_imports(self):
         """
@@ -80,29 +81,10 @@ class SystemMonitorOptimizer:
         """
         过滤网络相关的警告信息
         """
-        lines = stderr_content.split('\n')
-        filtered_lines = []
-        
-        # 需要过滤的警告模式
-        filter_patterns = [
-            'docker0: Resource temporarily unavailable',
-            'br-', 'virbr0', 'virbr1',
-            'No such file or directory',
-            'Permission denied',
-            'WARNING: you should run this program as super-user',
-            'WARNING: output may be incomplete or inaccurate',
-            '/sys/firmware/dmi/tables/smbios_entry_point',
-            "Can't read memory from /dev/mem"
-        ]
-        
-        for line in lines:
-            # 检查是否包含需要过滤的模式
-            should_filter = any(pattern in line for pattern in filter_patterns)
-            
-            if not should_filter and line.strip():
-                filtered_lines.append(line)
-        
-        return '\n'.join(filtered_lines)
+        return '\n'.join(
+            line for line in stderr_content.split('\n')
+            if line.strip() and _NETWORK_WARNING_RE.search(line) is None
+        )
     
     def apply_optimizations(self):
         """
@@ -159,18 +141,8 @@ def optimize_startup_logging():
     # 配置根日志记录器过滤器
     class SystemNoiseFilter(logging.Filter):
         def filter(self, record):
-            message = record.getMessage()
-            
             # 过滤系统资源警告
-            noise_patterns = [
-                'Resource temporarily unavailable',
-                'Permission denied',
-                'No such file or directory',
-                'docker0:', 'br-', 'virbr',
-                'should run this program as super-user'
-            ]
-            
-            return not any(pattern in message for pattern in noise_patterns)
+            return _NOISE_RE.search(record.getMessage()) is None
     
     # 添加过滤器到根记录器
     logging.getLogger().addFilter(SystemNoiseFilter())
\ No newline at end of file
@@ -3,6 +3,7 @@ Pytest configuration and shared fixtures for Market Data Hub tests.
 """
 
 import pytest
+import pytest_asyncio
 import os
 import sys
 import tempfile
@@ -21,9 +22,29 @@ def event_loop_policy():
     import asyncio
     return asyncio.get_event_loop_policy()
 
+@pytest.fixture(scope="session")
+def event_loop(event_loop_policy):
+    """Share one event loop across the session so session-scoped async fixtures can use it."""
+    loop = event_loop_policy.new_event_loop()
+    yield loop
+    loop.close()
+
 @pytest.fixture(scope="session")
 def test_database_url():
-    """Create a temporary database URL for testing."""
+    """
+    Database URL for testing.
+    
+    Uses a shared-cache in-memory SQLite database; DatabaseManager already
+    uses StaticPool for SQLite, so every session sees the same data. Set
+    TEST_DATABASE_FILE=true to use a temporary file instead when the
+    database needs to be inspected while debugging.
+    """
+    if os.getenv("TEST_DATABASE_FILE", "false").lower() != "true":
+        # One database per pytest-xdist worker ("master" when not distributed)
+        worker = os.getenv("PYTEST_XDIST_WORKER", "master")
+        yield f"sqlite:///file:testdb_{worker}?mode=memory&cache=shared&uri=true"
+        return
+    
     db_fd, db_path = tempfile.mkstemp(suffix='.db')
     os.close(db_fd)
     db_url = f"sqlite:///{db_path}"
@@ -47,20 +68,91 @@ def test_environment(test_database_url):
         'ENABLE_PERFORMANCE_MONITORING': 'true'
     }
     
-    # Store original values
-    original_env = {}
-    for key, value in test_env.items():
-        original_env[key] = os.environ.get(key)
-        os.environ[key] = value
+    # Original values are restored on exit, even if a test errors
+    with pytest.MonkeyPatch.context() as mp:
+        for key, value in test_env.items():
+            mp.setenv(key, value)
+        
+        yield test_env
+
+@pytest_asyncio.fixture(scope="session")
+async def db_manager(test_environment):
+    """Initialize the test database once for the whole session."""
+    from app.config.database import DatabaseManager
+    
+    manager = DatabaseManager()
+    success = await manager.initialize()
+    assert success, "Database initialization failed"
     
-    yield test_env
+    yield manager
     
-    # Restore original environment
-    for key, original_value in original_env.items():
-        if original_value is None:
-            os.environ.pop(key, None)
-        else:
-            os.environ[key] = original_value
+    await manager.shutdown()
+
+@pytest_asyncio.fixture
+async def db_service(db_manager):
+    """
+    Database service whose writes are rolled back after each test.
+    
+    Sessions are bound to a single connection inside an outer transaction;
+    commits made by the service only release a SAVEPOINT, so rolling back
+    the outer transaction restores the database for the next test.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from app.services.database_service import DatabaseService
+    
+    async with db_manager._async_engine.connect() as conn:
+        # pysqlite defers BEGIN, which breaks SAVEPOINT; emit it ourselves
+        @event.listens_for(conn.sync_connection, "begin")
+        def do_begin(sync_conn):
+            sync_conn.exec_driver_sql("BEGIN")
+        
+        await conn.begin()
+        
+        original_factory = db_manager._async_session_factory
+        db_manager._async_session_factory = async_sessionmaker(
+            bind=conn,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint"
+        )
+        
+        service = DatabaseService()
+        service.db_manager = db_manager
+        
+        try:
+            yield service
+        finally:
+            db_manager._async_session_factory = original_factory
+            await conn.rollback()
+
+@pytest.fixture(scope="module")
+def app(db_manager):
+    """FastAPI app with the account routes, built once per module."""
+    from fastapi import FastAPI
+    from app.api.routes import health
+    from app.routes.accounts import router as accounts_router, get_database_service
+    from app.services.database_service import DatabaseService
+    
+    test_app = FastAPI(title="Test API")
+    test_app.include_router(health.router, prefix="/api", tags=["health"])
+    test_app.include_router(accounts_router)
+    
+    # Shares db_manager, so tests using db_service get their writes rolled back
+    service = DatabaseService()
+    service.db_manager = db_manager
+    test_app.dependency_overrides[get_database_service] = lambda: service
+    
+    return test_app
+
+@pytest_asyncio.fixture(scope="module")
+async def client(app):
+    """HTTP client for the test app, shared across a module."""
+    from httpx import ASGITransport, AsyncClient
+    
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
 
 @pytest.fixture
 def sample_ctp_account():
@@ -96,28 +188,6 @@ def sample_sopt_account():
         "description": "Test SOPT Account"
     }
 
-@pytest.fixture
-def mock_tick_data():
-    """Generate mock tick data for testing."""
-    from datetime import datetime, timezone
-    
-    class MockTickData:
-        def __init__(self, symbol="TEST", price=100.0):
-            self.symbol = symbol
-            self.vt_symbol = f"{symbol}.MOCK"
-            # Import timezone utilities
-            from app.utils.timezone import now_china
-            self.datetime = now_china()
-            self.last_price = price
-            self.volume = 1000
-            self.last_volume = 10
-            self.bid_price_1 = price - 0.05
-            self.ask_price_1 = price + 0.05
-            self.bid_volume_1 = 50
-            self.ask_volume_1 = 50
-    
-    return MockTickData
-
 @pytest.fixture
 def performance_thresholds():
     """Provide performance threshold configuration for testing."""
@@ -135,6 +205,7 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "performance: mark test as performance test")
     config.addinivalue_line("markers", "load: mark test as load test")
     config.addinivalue_line("markers", "slow: mark test as slow running")
+    config.addinivalue_line("markers", "benchmark: mark test as wall-clock performance regression test")
 
 def pytest_collection_modifyitems(config, items):
     """Modify test collection to add markers based on file location."""
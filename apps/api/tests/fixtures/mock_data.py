@@ -0,0 +1,44 @@
+"""Mock market data objects shared across tests."""
+
+from datetime import datetime
+from typing import Optional
+
+from app.utils.timezone import now_china
+
+
+class MockTickData:
+    """
+    Minimal stand-in for a vnpy TickData object, with __slots__ for its fields.
+    
+    vt_symbol is None unless given, and the tick time defaults to now_china();
+    pass tick_datetime to control it.
+    """
+    
+    __slots__ = (
+        "symbol", "vt_symbol", "datetime", "last_price", "volume", "last_volume",
+        "bid_price_1", "ask_price_1", "bid_volume_1", "ask_volume_1"
+    )
+    
+    def __init__(
+        self,
+        symbol: str = "TEST",
+        last_price: float = 100.0,
+        spread: float = 0.05,
+        tick_datetime: Optional[datetime] = None,
+        vt_symbol: Optional[str] = None
+    ):
+        self.symbol = symbol
+        self.vt_symbol = vt_symbol
+        self.datetime = tick_datetime if tick_datetime is not None else now_china()
+        self.last_price = last_price
+        self.volume = 1000
+        self.last_volume = 10
+        self.bid_price_1 = last_price - spread
+        self.ask_price_1 = last_price + spread
+        self.bid_volume_1 = 50
+        self.ask_volume_1 = 50
+
+
+def by_symbol(canary_data):
+    """Index canary monitor entries by contract symbol."""
+    return {d["contract_symbol"]: d for d in canary_data}
@@ -4,8 +4,10 @@ Tests the full flow from tick reception to health status determination.
 """
 
 import pytest
+import pytest_asyncio
 import asyncio
 import os
+from contextlib import ExitStack
 from datetime import datetime, timezone, timedelta
 from unittest.mock import Mock, AsyncMock, patch
 import json
@@ -13,20 +15,7 @@ import json
 from app.services.health_monitor import HealthMonitor
 from app.services.gateway_manager import GatewayManager
 from app.services.websocket_manager import WebSocketManager
-
-
-class MockTickData:
-    """Mock tick data for testing."""
-    def __init__(self, symbol="rb2601.SHFE", last_price=3800.0):
-        self.symbol = symbol
-        self.datetime = datetime.now()
-        self.last_price = last_price
-        self.volume = 1000
-        self.last_volume = 10
-        self.bid_price_1 = last_price - 1.0
-        self.ask_price_1 = last_price + 1.0
-        self.bid_volume_1 = 50
-        self.ask_volume_1 = 50
+from tests.fixtures.mock_data import MockTickData, by_symbol
 
 
 class MockEvent:
@@ -36,46 +25,63 @@ class MockEvent:
         self.data = data
 
 
-@pytest.fixture(autouse=True)
+@pytest.fixture(scope="module", autouse=True)
 def setup_environment():
-    """Setup test environment variables."""
-    # Set canary configuration
-    os.environ["CTP_CANARY_CONTRACTS"] = "rb2601,au2512"
-    os.environ["SOPT_CANARY_CONTRACTS"] = "510050,159915"
-    os.environ["CANARY_HEARTBEAT_TIMEOUT_SECONDS"] = "30"
-    
-    yield
+    """Setup test environment variables once for this module."""
+    # Set canary configuration; original values are restored on exit
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("CTP_CANARY_CONTRACTS", "rb2601,au2512")
+        mp.setenv("SOPT_CANARY_CONTRACTS", "510050,159915")
+        mp.setenv("CANARY_HEARTBEAT_TIMEOUT_SECONDS", "30")
+        
+        yield
+
+
+@pytest.fixture(scope="module", autouse=True)
+def health_monitor_patches():
+    """
+    Patch the services HealthMonitor depends on, once for this module.
     
-    # Cleanup environment
-    for key in ["CTP_CANARY_CONTRACTS", "SOPT_CANARY_CONTRACTS", "CANARY_HEARTBEAT_TIMEOUT_SECONDS"]:
-        if key in os.environ:
-            del os.environ[key]
+    Autouse, so every test here sees the same patched objects whichever
+    fixtures it takes; health_monitor_mocks resets their state per test.
+    """
+    with ExitStack() as stack:
+        mock_event_bus = stack.enter_context(patch('app.services.event_bus.event_bus'))
+        mock_gm_instance = stack.enter_context(patch('app.services.gateway_manager.gateway_manager'))
+        yield mock_event_bus, mock_gm_instance
 
 
 @pytest.fixture
-async def health_monitor():
+def health_monitor_mocks(health_monitor_patches):
+    """Reset the module's HealthMonitor mocks and configure them for one test."""
+    mock_event_bus, mock_gm_instance = health_monitor_patches
+    mock_event_bus.reset_mock(return_value=True, side_effect=True)
+    mock_gm_instance.reset_mock(return_value=True, side_effect=True)
+    
+    mock_event_bus.start = AsyncMock()
+    mock_event_bus.stop = AsyncMock()
+    mock_event_bus.publish_health_status_change = AsyncMock()
+    
+    # Mock gateway manager to return test accounts
+    mock_gm_instance.get_account_status.return_value = {
+        'accounts': [
+            {'id': 'test_ctp_01', 'gateway_type': 'ctp', 'is_enabled': True},
+            {'id': 'test_sopt_01', 'gateway_type': 'sopt', 'is_enabled': True}
+        ]
+    }
+    
+    return health_monitor_patches
+
+
+@pytest_asyncio.fixture
+async def health_monitor(health_monitor_mocks):
     """Create a health monitor instance for testing."""
-    with patch('app.services.event_bus.event_bus') as mock_event_bus, \
-         patch('app.services.gateway_manager.gateway_manager') as mock_gm_instance:
-        
-        mock_event_bus.start = AsyncMock()
-        mock_event_bus.stop = AsyncMock()
-        mock_event_bus.publish_health_status_change = AsyncMock()
-        
-        # Mock gateway manager to return test accounts
-        mock_gm_instance.get_account_status.return_value = {
-            'accounts': [
-                {'id': 'test_ctp_01', 'gateway_type': 'ctp', 'is_enabled': True},
-                {'id': 'test_sopt_01', 'gateway_type': 'sopt', 'is_enabled': True}
-            ]
-        }
-        
-        monitor = HealthMonitor()
-        yield monitor
-        
-        # Cleanup
-        if monitor._running:
-            await monitor.stop()
+    monitor = HealthMonitor()
+    yield monitor
+    
+    # Cleanup
+    if monitor._running:
+        await monitor.stop()
 
 
 @pytest.fixture
@@ -84,16 +90,32 @@ def gateway_manager():
     return GatewayManager()
 
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def websocket_manager():
     """Create a websocket manager instance for testing."""
     with patch('app.services.websocket_manager.WebSocketManager.get_instance') as mock_ws_instance:
         manager = WebSocketManager()
-        manager.broadcast = AsyncMock()
+        
+        # Set when a broadcast happens, so tests can wait for it directly
+        manager.broadcast_done = asyncio.Event()
+        
+        async def on_broadcast(*args, **kwargs):
+            manager.broadcast_done.set()
+        
+        manager.broadcast = AsyncMock(side_effect=on_broadcast)
         mock_ws_instance.return_value = manager
         yield manager
 
 
+@pytest.fixture
+def canary_test_setup(health_monitor, websocket_manager):
+    """Health monitor and websocket manager wired together for canary tests."""
+    return {
+        'health_monitor': health_monitor,
+        'websocket_manager': websocket_manager
+    }
+
+
 class TestCanaryIntegration:
     """Integration tests for canary functionality."""
     
@@ -110,7 +132,7 @@ class TestCanaryIntegration:
         ]
         
         # Simulate tick event for canary contract
-        tick_data = MockTickData(symbol="rb2601.SHFE", last_price=3850.0)
+        tick_data = MockTickData(symbol="rb2601.SHFE", last_price=3850.0, spread=1.0, tick_datetime=datetime.now())
         event = MockEvent("eTick", tick_data)
         
         # Process tick through gateway manager
@@ -121,7 +143,7 @@ class TestCanaryIntegration:
         assert len(canary_status) > 0
         
         # Find rb2601 status
-        rb2601_status = next((status for status in canary_status if status['contract_symbol'] == 'rb2601'), None)
+        rb2601_status = by_symbol(canary_status).get('rb2601')
         assert rb2601_status is not None
         assert rb2601_status['status'] == 'ACTIVE'
         assert rb2601_status['tick_count_1min'] >= 1
@@ -140,21 +162,21 @@ class TestCanaryIntegration:
         # 1. Test ACTIVE status (recent tick)
         health_monitor.update_canary_tick("test_ctp_01", "rb2601", current_time)
         canary_data = health_monitor.get_canary_monitor_data()
-        rb2601_data = next((d for d in canary_data if d['contract_symbol'] == 'rb2601'), None)
+        rb2601_data = by_symbol(canary_data).get('rb2601')
         assert rb2601_data['status'] == 'ACTIVE'
         
         # 2. Test STALE status (31 seconds old, within 2x timeout)
         stale_time = current_time - timedelta(seconds=31)
         health_monitor.update_canary_tick("test_ctp_01", "rb2601", stale_time)
         canary_data = health_monitor.get_canary_monitor_data()
-        rb2601_data = next((d for d in canary_data if d['contract_symbol'] == 'rb2601'), None)
+        rb2601_data = by_symbol(canary_data).get('rb2601')
         assert rb2601_data['status'] == 'STALE'
         
         # 3. Test INACTIVE status (61 seconds old, beyond 2x timeout)
         inactive_time = current_time - timedelta(seconds=61)
         health_monitor.update_canary_tick("test_ctp_01", "rb2601", inactive_time)
         canary_data = health_monitor.get_canary_monitor_data()
-        rb2601_data = next((d for d in canary_data if d['contract_symbol'] == 'rb2601'), None)
+        rb2601_data = by_symbol(canary_data).get('rb2601')
         assert rb2601_data['status'] == 'INACTIVE'
         
         await health_monitor.stop()
@@ -174,7 +196,7 @@ class TestCanaryIntegration:
         health_monitor.update_canary_tick("test_ctp_02", "rb2601", current_time - timedelta(seconds=5))
         
         canary_data = health_monitor.get_canary_monitor_data()
-        rb2601_data = next((d for d in canary_data if d['contract_symbol'] == 'rb2601'), None)
+        rb2601_data = by_symbol(canary_data).get('rb2601')
         
         # Should use the latest timestamp and aggregate tick counts
         assert rb2601_data['status'] == 'ACTIVE'  # Latest tick is recent
@@ -195,8 +217,8 @@ class TestCanaryIntegration:
         current_time = datetime.now()
         health_monitor.update_canary_tick("test_ctp_01", "rb2601", current_time)
         
-        # Give async task time to complete
-        await asyncio.sleep(0.1)
+        # Wait for the async broadcast task to run
+        await asyncio.wait_for(websocket_manager.broadcast_done.wait(), timeout=1.0)
         
         # Verify WebSocket broadcast was called
         assert websocket_manager.broadcast.called
@@ -274,27 +296,28 @@ class TestCanaryIntegration:
         current_time = datetime.now()
         
         # Test valid tick data
-        valid_tick = MockTickData(symbol="rb2601.SHFE", last_price=3800.0)
+        valid_tick = MockTickData(symbol="rb2601.SHFE", last_price=3800.0, spread=1.0, tick_datetime=datetime.now())
         health_monitor.update_canary_tick("test_ctp_01", "rb2601", current_time, valid_tick)
         
         canary_data = health_monitor.get_canary_monitor_data()
-        rb2601_data = next((d for d in canary_data if d['contract_symbol'] == 'rb2601'), None)
+        rb2601_data = by_symbol(canary_data).get('rb2601')
         assert rb2601_data is not None
         assert rb2601_data['tick_count_1min'] >= 1
         
         # Test invalid tick data (zero price)
-        invalid_tick = MockTickData(symbol="rb2601.SHFE", last_price=0.0)
+        invalid_tick = MockTickData(symbol="rb2601.SHFE", last_price=0.0, spread=1.0, tick_datetime=datetime.now())
         initial_count = rb2601_data['tick_count_1min']
         
         health_monitor.update_canary_tick("test_ctp_01", "rb2601", current_time + timedelta(seconds=1), invalid_tick)
         
         # Should not have increased tick count due to validation failure
         canary_data = health_monitor.get_canary_monitor_data()
-        rb2601_data = next((d for d in canary_data if d['contract_symbol'] == 'rb2601'), None)
+        rb2601_data = by_symbol(canary_data).get('rb2601')
         assert rb2601_data['tick_count_1min'] == initial_count
         
         await health_monitor.stop()
     
+    @pytest.mark.benchmark
     @pytest.mark.asyncio
     async def test_canary_performance_under_load(self, canary_test_setup):
         """Test canary processing performance under load."""
@@ -304,12 +327,14 @@ class TestCanaryIntegration:
         await health_monitor.start()
         
         import time
-        start_time = time.time()
         current_time = datetime.now()
+        # Build tick times up front so only update_canary_tick is timed
+        tick_times = [current_time + timedelta(milliseconds=i) for i in range(1000)]
+        
+        start_time = time.time()
         
         # Process 1000 canary ticks
-        for i in range(1000):
-            tick_time = current_time + timedelta(milliseconds=i)
+        for tick_time in tick_times:
             health_monitor.update_canary_tick("test_ctp_01", "rb2601", tick_time)
         
         processing_time = time.time() - start_time
@@ -319,7 +344,7 @@ class TestCanaryIntegration:
         
         # Verify data consistency
         canary_data = health_monitor.get_canary_monitor_data()
-        rb2601_data = next((d for d in canary_data if d['contract_symbol'] == 'rb2601'), None)
+        rb2601_data = by_symbol(canary_data).get('rb2601')
         assert rb2601_data is not None
         assert rb2601_data['status'] == 'ACTIVE'
         
@@ -9,21 +9,15 @@ from datetime import datetime, timezone, timedelta
 from unittest.mock import Mock, AsyncMock, patch
 
 from app.services.health_monitor import HealthMonitor
+from tests.fixtures.mock_data import by_symbol
 
 
 @pytest.fixture(autouse=True)
-def setup_environment():
+def setup_environment(monkeypatch):
     """Setup test environment variables."""
-    os.environ["CTP_CANARY_CONTRACTS"] = "rb2601,au2512"
-    os.environ["SOPT_CANARY_CONTRACTS"] = "510050,159915"
-    os.environ["CANARY_HEARTBEAT_TIMEOUT_SECONDS"] = "30"
-    
-    yield
-    
-    # Cleanup environment
-    for key in ["CTP_CANARY_CONTRACTS", "SOPT_CANARY_CONTRACTS", "CANARY_HEARTBEAT_TIMEOUT_SECONDS"]:
-        if key in os.environ:
-            del os.environ[key]
+    monkeypatch.setenv("CTP_CANARY_CONTRACTS", "rb2601,au2512")
+    monkeypatch.setenv("SOPT_CANARY_CONTRACTS", "510050,159915")
+    monkeypatch.setenv("CANARY_HEARTBEAT_TIMEOUT_SECONDS", "30")
 
 
 class TestCanarySimpleIntegration:
@@ -66,7 +60,7 @@ class TestCanarySimpleIntegration:
                 canary_data = health_monitor.get_canary_monitor_data()
                 assert len(canary_data) > 0
                 
-                rb2601_data = next((d for d in canary_data if d['contract_symbol'] == 'rb2601'), None)
+                rb2601_data = by_symbol(canary_data).get('rb2601')
                 assert rb2601_data is not None
                 assert rb2601_data['status'] == 'ACTIVE'
                 assert rb2601_data['tick_count_1min'] >= 1
@@ -76,7 +70,7 @@ class TestCanarySimpleIntegration:
                 health_monitor.update_canary_tick("test_ctp_01", "rb2601", old_time)
                 
                 canary_data = health_monitor.get_canary_monitor_data()
-                rb2601_data = next((d for d in canary_data if d['contract_symbol'] == 'rb2601'), None)
+                rb2601_data = by_symbol(canary_data).get('rb2601')
                 assert rb2601_data['status'] == 'INACTIVE'
                 
             finally:
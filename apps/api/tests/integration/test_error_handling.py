@@ -151,8 +151,9 @@ async def test_successful_connection_with_retry():
     print("\n🔄 Testing Successful Connection After Initial Failure")
     print("=" * 50)
     
-    # Reset to valid configuration
-    os.environ["DATABASE_URL"] = "sqlite:///./test_retry.db"
+    # Reset to valid configuration, with one database file per pytest-xdist worker
+    db_path = f"test_retry_{os.getenv('PYTEST_XDIST_WORKER', 'master')}.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///./{db_path}"
     os.environ["ENABLE_DATABASE"] = "true"
     os.environ["DATABASE_RETRY_ATTEMPTS"] = "3"
     os.environ["DATABASE_RETRY_DELAY"] = "0.1"
@@ -200,7 +201,7 @@ async def test_successful_connection_with_retry():
     
     # Cleanup test database
     try:
-        os.remove("test_retry.db")
+        os.remove(db_path)
     except:
         pass
     
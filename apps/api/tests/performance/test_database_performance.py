@@ -7,6 +7,7 @@ and validates that the system meets performance requirements.
 """
 
 import asyncio
+import pytest
 import time
 import statistics
 import os
@@ -21,6 +22,18 @@ from app.config.database import db_manager
 from app.services.database_service import database_service
 
 
+@pytest.fixture(scope="module", autouse=True)
+async def initialized_database(test_environment):
+    """Initialize the global database manager against the test database, as main() does."""
+    # The config was read at import time, before test_environment set DATABASE_URL
+    db_manager.config.__init__()
+    assert await db_manager.initialize(), "Database initialization failed"
+    
+    yield
+    
+    await db_manager.shutdown()
+
+
 class PerformanceMetrics:
     """Class to track performance metrics."""
     
@@ -0,0 +1,106 @@
+"""
+Unit tests for the WebSocket log handler.
+"""
+
+import asyncio
+import logging
+import sys
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.websocket_log_handler import WebSocketLogHandler
+
+
+class TestWebSocketLogHandler:
+    """Test queueing, formatting and shutdown of the WebSocket log handler."""
+
+    @pytest.fixture
+    def manager(self):
+        """A WebSocket manager with one connected client."""
+        manager = MagicMock()
+        manager.get_connection_count.return_value = 1
+        manager.publish_log_event = AsyncMock()
+        return manager
+
+    @pytest.fixture
+    def handler(self, manager):
+        """A handler wired to the mock manager, closed after the test."""
+        handler = WebSocketLogHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        handler._websocket_manager = manager
+        yield handler
+        handler.close()
+
+    @staticmethod
+    def make_record(msg, *args, level=logging.INFO, exc_info=None):
+        return logging.LogRecord("app.services.test", level, __file__, 1, msg, args, exc_info)
+
+    @staticmethod
+    async def drain(handler):
+        while not handler._queue.empty():
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+    @pytest.mark.asyncio
+    async def test_dropped_records_are_never_formatted(self, handler, manager):
+        """Test that formatting happens on the drain side, after drop-oldest."""
+        handler._max_queue_size = 2
+
+        with patch.object(handler, "format", wraps=handler.format) as format_spy:
+            # No awaits in between, so the drain task can't run yet
+            for i in range(5):
+                handler.emit(self.make_record("record %d", i))
+            assert format_spy.call_count == 0
+
+            await self.drain(handler)
+
+        assert format_spy.call_count == 2
+        assert handler._dropped_count == 3
+        messages = [call.kwargs["message"] for call in manager.publish_log_event.await_args_list]
+        assert messages == ["INFO record 3", "INFO record 4"]
+
+    @pytest.mark.asyncio
+    async def test_args_and_exception_are_captured_at_emit(self, handler, manager):
+        """Test that later changes to args don't leak into the queued message."""
+        items = ["a"]
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = self.make_record("items=%s", items, level=logging.ERROR, exc_info=sys.exc_info())
+
+        handler.emit(record)
+        items.append("b")
+        await self.drain(handler)
+
+        message = manager.publish_log_event.await_args.kwargs["message"]
+        assert message.startswith("ERROR items=['a']")
+        assert "ValueError: boom" in message
+        # The caller's record is left untouched
+        assert record.exc_info is not None
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_drain_task(self, handler):
+        """Test that close() stops the drain task."""
+        handler.emit(self.make_record("hello"))
+        task = handler._drain_task
+        assert task is not None and not task.done()
+
+        handler.close()
+        await asyncio.sleep(0)
+
+        assert task.cancelled()
+        assert handler._drain_task is None
+
+    @pytest.mark.asyncio
+    async def test_loop_switch_cancels_previous_drain_task(self, handler):
+        """Test that moving to a new loop doesn't leave the old task behind."""
+        handler.emit(self.make_record("hello"))
+        old_task = handler._drain_task
+
+        # Pretend the next record arrives on a different loop
+        handler._loop = object()
+        handler.emit(self.make_record("again"))
+        await asyncio.sleep(0)
+
+        assert old_task.cancelled()
+        assert handler._drain_task is not old_task
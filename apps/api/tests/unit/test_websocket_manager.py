@@ -13,6 +13,8 @@ This test suite covers all functionality of the WebSocketManager class including
 
 import pytest
 import asyncio
+import json
+import time
 import uuid
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from datetime import datetime, timezone, timedelta
@@ -28,8 +30,10 @@ class MockWebSocket:
     
     def __init__(self, should_fail: bool = False, fail_on_send: bool = False):
         self.send_json = AsyncMock()
+        self.send_text = AsyncMock()
         self.close = AsyncMock()
         self.messages_sent: List[Dict[str, Any]] = []
+        self.frames_sent: List[Dict[str, Any]] = []
         self.closed = False
         self.should_fail = should_fail
         self.fail_on_send = fail_on_send
@@ -37,8 +41,10 @@ class MockWebSocket:
         # Configure behavior
         if fail_on_send:
             self.send_json.side_effect = Exception("Connection failed")
+            self.send_text.side_effect = Exception("Connection failed")
         else:
             self.send_json.side_effect = self._track_message
+            self.send_text.side_effect = self._track_text
     
     def _track_message(self, message: Dict[str, Any]) -> None:
         """Track messages sent through this WebSocket."""
@@ -46,6 +52,16 @@ class MockWebSocket:
             raise Exception("WebSocket connection failed")
         self.messages_sent.append(message)
     
+    def _track_text(self, data: str) -> None:
+        """Track pre-serialized JSON messages, unwrapping event batches like the client does."""
+        frame = json.loads(data)
+        self.frames_sent.append(frame)
+        if frame.get("event_type") == "event_batch":
+            for event in frame["events"]:
+                self._track_message(event)
+        else:
+            self._track_message(frame)
+    
     async def mock_close(self):
         """Mock close method."""
         self.closed = True
@@ -100,9 +116,7 @@ class TestWebSocketManagerCore:
     def test_initialization(self, websocket_manager):
         """Test proper initialization of WebSocket manager."""
         assert isinstance(websocket_manager.active_connections, dict)
-        assert isinstance(websocket_manager.connection_health, dict)
         assert len(websocket_manager.active_connections) == 0
-        assert len(websocket_manager.connection_health) == 0
         assert websocket_manager._ping_interval == 30
         assert websocket_manager._ping_timeout == 10
         assert websocket_manager._rate_limit_max_events == 100
@@ -121,13 +135,12 @@ class TestConnectionManagement:
         assert client_id is not None
         assert isinstance(client_id, str)
         assert client_id in websocket_manager.active_connections
-        assert client_id in websocket_manager.connection_health
         assert websocket_manager.get_connection_count() == 1
         
-        # Verify connection health tracking
-        health_time = websocket_manager.connection_health[client_id]
-        assert isinstance(health_time, datetime)
-        assert health_time.tzinfo == timezone.utc
+        # Verify connection health tracking uses the monotonic clock
+        health_time = websocket_manager.active_connections[client_id].last_seen
+        assert isinstance(health_time, float)
+        assert health_time <= time.monotonic()
     
     @pytest.mark.asyncio
     async def test_connect_multiple_clients(self, websocket_manager):
@@ -147,7 +160,6 @@ class TestConnectionManagement:
         # Verify all are tracked
         for client_id in client_ids:
             assert client_id in websocket_manager.active_connections
-            assert client_id in websocket_manager.connection_health
     
     @pytest.mark.asyncio
     async def test_disconnect_client(self, websocket_manager, mock_websocket):
@@ -159,7 +171,6 @@ class TestConnectionManagement:
         
         assert websocket_manager.get_connection_count() == 0
         assert client_id not in websocket_manager.active_connections
-        assert client_id not in websocket_manager.connection_health
     
     @pytest.mark.asyncio
     async def test_disconnect_nonexistent_client(self, websocket_manager):
@@ -169,7 +180,20 @@ class TestConnectionManagement:
         # Should not raise exception
         await websocket_manager.disconnect(fake_client_id)
         assert websocket_manager.get_connection_count() == 0
-    
+
+    @pytest.mark.asyncio
+    async def test_disconnect_many_clients(self, websocket_manager):
+        """Test removing several clients at once, ignoring unknown IDs."""
+        client_ids = [await websocket_manager.connect(MockWebSocket()) for _ in range(3)]
+
+        removed = await websocket_manager._disconnect_many(
+            [client_ids[0], client_ids[2], str(uuid.uuid4())]
+        )
+
+        assert len(removed) == 2
+        assert list(websocket_manager.active_connections) == [client_ids[1]]
+        assert all(state.sender.cancelled() or state.sender.cancelling() for state in removed)
+
     @pytest.mark.asyncio
     async def test_connection_info(self, websocket_manager):
         """Test getting connection information."""
@@ -209,18 +233,20 @@ class TestMessageHandling:
         
         test_message = {
             "event_type": "test_event",
+            "timestamp": "2023-01-01T00:00:00+08:00",
             "data": "test_data",
             "number": 42
         }
         
         await websocket_manager.broadcast(test_message)
+        await websocket_manager.flush_client_queues()
         
         assert len(mock_websocket.messages_sent) == 1
         sent_message = mock_websocket.messages_sent[0]
         assert sent_message["event_type"] == "test_event"
         assert sent_message["data"] == "test_data"
         assert sent_message["number"] == 42
-        assert "timestamp" in sent_message  # Should be added automatically
+        assert sent_message["timestamp"] == "2023-01-01T00:00:00+08:00"
     
     @pytest.mark.asyncio
     async def test_broadcast_to_multiple_clients(self, websocket_manager):
@@ -235,6 +261,7 @@ class TestMessageHandling:
         
         test_message = {"event_type": "broadcast_test", "message": "hello_all"}
         await websocket_manager.broadcast(test_message)
+        await websocket_manager.flush_client_queues()
         
         # Verify all clients received the message
         for ws in websockets:
@@ -250,6 +277,20 @@ class TestMessageHandling:
         # Should not raise exception
         await websocket_manager.broadcast(test_message)
     
+    @pytest.mark.asyncio
+    async def test_broadcast_in_chunks(self, websocket_manager):
+        """Test that a fan-out larger than one chunk still reaches every client."""
+        websocket_manager._broadcast_chunk_size = 2
+        websockets = [MockWebSocket() for _ in range(5)]
+        for ws in websockets:
+            await websocket_manager.connect(ws)
+        
+        await websocket_manager.broadcast({"event_type": "chunked"})
+        await websocket_manager.flush_client_queues()
+        
+        for ws in websockets:
+            assert [m["event_type"] for m in ws.messages_sent] == ["chunked"]
+    
     @pytest.mark.asyncio
     async def test_send_to_specific_client(self, websocket_manager):
         """Test sending message to specific client."""
@@ -276,25 +317,58 @@ class TestMessageHandling:
         assert success is False
     
     @pytest.mark.asyncio
-    async def test_timestamp_addition(self, websocket_manager, mock_websocket):
-        """Test that timestamps are added to messages."""
+    async def test_broadcast_does_not_mutate_message(self, websocket_manager, mock_websocket):
+        """Test that broadcast sends messages as-is without stamping them."""
         await websocket_manager.connect(mock_websocket)
         
-        # Message without timestamp
+        # Message without timestamp is neither stamped nor modified
         message_without_timestamp = {"event_type": "test"}
         await websocket_manager.broadcast(message_without_timestamp)
+        await websocket_manager.flush_client_queues()
         
-        sent_message = mock_websocket.messages_sent[0]
-        assert "timestamp" in sent_message
+        assert message_without_timestamp == {"event_type": "test"}
+        assert mock_websocket.messages_sent[0] == {"event_type": "test"}
         
-        # Message with timestamp (should not be overwritten)
+        # Message with timestamp keeps it
         custom_timestamp = "2023-01-01T00:00:00Z"
         message_with_timestamp = {"event_type": "test", "timestamp": custom_timestamp}
         await websocket_manager.broadcast(message_with_timestamp)
+        await websocket_manager.flush_client_queues()
         
         sent_message = mock_websocket.messages_sent[1]
         assert sent_message["timestamp"] == custom_timestamp
 
+    @pytest.mark.asyncio
+    async def test_broadcast_encodes_non_json_metadata(self, websocket_manager, mock_websocket):
+        """Test that values JSON can't represent natively are sent as strings."""
+        from decimal import Decimal
+
+        await websocket_manager.connect(mock_websocket)
+
+        await websocket_manager.broadcast({"event_type": "test", "metadata": {"price": Decimal("1.5")}})
+        await websocket_manager.flush_client_queues()
+
+        assert mock_websocket.messages_sent[0]["metadata"] == {"price": "1.5"}
+
+    @pytest.mark.asyncio
+    async def test_producers_stamp_timestamp(self, websocket_manager, mock_websocket):
+        """Test that every event producer sets its own timestamp."""
+        await websocket_manager.connect(mock_websocket)
+        
+        await websocket_manager._handle_gateway_event({"gateway_id": "gw"})
+        await websocket_manager._handle_recovery_event({"gateway_id": "gw"})
+        await websocket_manager.publish_log_event("INFO", "message", "test")
+        await websocket_manager.publish_canary_tick_update("gw", "rb2510", 1, "", "ACTIVE", 60)
+        await websocket_manager.broadcast_gateway_control_action("gw", "start", "completed", "ok")
+        await websocket_manager.force_flush_events()
+        
+        assert len(mock_websocket.messages_sent) == 5
+        assert all(m.get("timestamp") for m in mock_websocket.messages_sent)
+        assert all(
+            datetime.fromisoformat(m["timestamp"]).utcoffset() == timedelta(hours=8)
+            for m in mock_websocket.messages_sent
+        )
+
 
 class TestErrorHandling:
     """Test error handling and connection recovery."""
@@ -312,6 +386,7 @@ class TestErrorHandling:
         
         # Attempt broadcast
         await websocket_manager.broadcast({"event_type": "test"})
+        await websocket_manager.flush_client_queues()
         
         # Good client should have received message
         assert len(good_ws.messages_sent) == 1
@@ -365,6 +440,19 @@ class TestEventBusIntegration:
         assert sent_message["current_status"] == "UNHEALTHY"
         assert "metadata" in sent_message
     
+    @pytest.mark.asyncio
+    async def test_filtered_events_are_not_broadcast(self, websocket_manager, mock_websocket):
+        """Test that events rejected by their filter are dropped before broadcast."""
+        await websocket_manager.connect(mock_websocket)
+        websocket_manager._event_filters["gateway_status_change"] = lambda event: False
+        websocket_manager._event_filters["gateway_recovery_status"] = lambda event: False
+        
+        with patch.object(websocket_manager, "_rate_limited_broadcast", new=AsyncMock()) as broadcast:
+            await websocket_manager._handle_gateway_event({"gateway_id": "gw"})
+            await websocket_manager._handle_recovery_event({"gateway_id": "gw"})
+        
+        broadcast.assert_not_awaited()
+    
     @pytest.mark.asyncio
     async def test_recovery_event_handling(self, websocket_manager, mock_websocket):
         """Test handling gateway recovery events."""
@@ -455,7 +543,7 @@ class TestRateLimiting:
     
     @pytest.mark.asyncio
     async def test_rate_limiting_buffer(self, websocket_manager, mock_websocket):
-        """Test that events are buffered for rate limiting."""
+        """Test that a burst within the bucket capacity is sent without buffering."""
         client_id = await websocket_manager.connect(mock_websocket)
         
         # Send many events quickly
@@ -467,35 +555,47 @@ class TestRateLimiting:
                 source="test"
             )
         
-        # Events should be in buffer, not immediately sent
-        assert len(websocket_manager._event_buffer) > 0
+        # Bucket had enough tokens, so nothing waits in the buffer
+        assert len(websocket_manager._event_buffer) == 0
+        
+        await websocket_manager.flush_client_queues()
+        assert len(mock_websocket.messages_sent) == num_events
+    
+    @pytest.mark.asyncio
+    async def test_flush_coalesces_events_into_batches(self, websocket_manager, mock_websocket):
+        """Test that flushed events are sent as event_batch frames."""
+        await websocket_manager.connect(mock_websocket)
+        
+        for i in range(120):
+            websocket_manager._event_buffer.append({"event_type": "test", "id": i})
         
-        # Force flush to send events
         await websocket_manager.force_flush_events()
         
-        # Now messages should be sent
-        assert len(mock_websocket.messages_sent) == num_events
+        # 120 events split into frames of at most 50, order preserved
+        assert [len(f["events"]) for f in mock_websocket.frames_sent] == [50, 50, 20]
+        assert all(f["event_type"] == "event_batch" for f in mock_websocket.frames_sent)
+        assert [m["id"] for m in mock_websocket.messages_sent] == list(range(120))
     
     @pytest.mark.asyncio
     async def test_rate_limit_max_events(self, websocket_manager, mock_websocket):
-        """Test that rate limiting respects max events per window."""
-        client_id = await websocket_manager.connect(mock_websocket)
+        """Test that events beyond the bucket capacity are buffered and drained in order."""
+        websocket_manager._rate_limit_capacity = 10.0
+        websocket_manager._tokens = 10.0
+        await websocket_manager.connect(mock_websocket)
         
-        # Send more events than the rate limit allows
-        num_events = 150  # More than _rate_limit_max_events (100)
+        num_events = 30
         for i in range(num_events):
-            await websocket_manager.publish_log_event(
-                level="INFO",
-                message=f"Message {i}",
-                source="test"
-            )
+            await websocket_manager._rate_limited_broadcast({"event_type": "test", "id": i})
         
-        # Should trigger automatic flush due to buffer size
-        # Wait a moment for async processing
-        await asyncio.sleep(0.1)
+        # Only the burst capacity goes out immediately
+        await websocket_manager.flush_client_queues()
+        assert len(mock_websocket.messages_sent) <= 11
+        assert len(websocket_manager._event_buffer) > 0
         
-        # Should have sent at most the rate limit
-        assert len(mock_websocket.messages_sent) <= websocket_manager._rate_limit_max_events
+        # The rest drains at the refill rate (100/s), order preserved
+        await asyncio.sleep(0.4)
+        await websocket_manager.flush_client_queues()
+        assert [m["id"] for m in mock_websocket.messages_sent] == list(range(num_events))
     
     @pytest.mark.asyncio
     async def test_event_buffer_deque_maxlen(self, websocket_manager):
@@ -510,6 +610,27 @@ class TestRateLimiting:
         # Buffer should not exceed maximum length
         assert len(websocket_manager._event_buffer) <= 1000
 
+    def test_event_buffer_bounded_by_bytes(self):
+        """Test that the buffer evicts the oldest events to stay under its byte cap."""
+        from app.services.websocket_manager import ByteBoundedDeque
+
+        buffer = ByteBoundedDeque(max_bytes=1000, maxlen=100)
+        for i in range(10):
+            buffer.append({"id": i, "blob": "x" * 200})
+
+        assert buffer.nbytes <= 1000
+        assert [event["id"] for event in buffer] == [6, 7, 8, 9]
+        assert buffer.dropped_count == 6
+
+        # An event bigger than the whole cap is dropped without evicting others
+        buffer.append({"id": 10, "blob": "x" * 2000})
+        assert [event["id"] for event in buffer] == [6, 7, 8, 9]
+
+        # Popping releases the bytes
+        buffer.popleft()
+        assert len(buffer) == 3
+        assert buffer.nbytes == sum(len(json.dumps(e, separators=(",", ":"))) for e in buffer)
+
 
 class TestHealthMonitoring:
     """Test health monitoring and ping/pong functionality."""
@@ -518,14 +639,14 @@ class TestHealthMonitoring:
     async def test_client_health_update(self, websocket_manager, mock_websocket):
         """Test updating client health timestamp."""
         client_id = await websocket_manager.connect(mock_websocket)
-        original_health = websocket_manager.connection_health[client_id]
+        original_health = websocket_manager.active_connections[client_id].last_seen
         
         # Wait a moment then update health
         await asyncio.sleep(0.01)
         websocket_manager.update_client_health(client_id)
         
         # Health timestamp should be updated
-        updated_health = websocket_manager.connection_health[client_id]
+        updated_health = websocket_manager.active_connections[client_id].last_seen
         assert updated_health > original_health
     
     @pytest.mark.asyncio
@@ -536,6 +657,45 @@ class TestHealthMonitoring:
         # Should not raise exception
         websocket_manager.update_client_health(fake_client_id)
 
+    @pytest.mark.asyncio
+    async def test_monitor_pings_live_clients_and_drops_stale(self, websocket_manager):
+        """Test that the monitor sends the shared ping frame and evicts stale clients."""
+        from app.services.websocket_manager import PING_FRAME
+
+        websocket_manager._ping_interval = 0.05
+        websocket_manager._ping_timeout = 0.05
+        live_ws = MockWebSocket()
+        stale_ws = MockWebSocket()
+        live_id = await websocket_manager.connect(live_ws)
+        stale_id = await websocket_manager.connect(stale_ws)
+        websocket_manager.active_connections[stale_id].last_seen = time.monotonic() - 10
+
+        await asyncio.sleep(0.08)
+
+        assert stale_id not in websocket_manager.active_connections
+        assert live_id in websocket_manager.active_connections
+        live_ws.send_text.assert_any_call(PING_FRAME)
+        assert json.loads(PING_FRAME) == {"type": "ping"}
+
+        await websocket_manager.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_monitor_drops_client_whose_ping_fails(self, websocket_manager):
+        """Test that a failed ping disconnects only that client."""
+        websocket_manager._ping_interval = 0.05
+        good_ws = MockWebSocket()
+        bad_ws = MockWebSocket(fail_on_send=True)
+        good_id = await websocket_manager.connect(good_ws)
+        bad_id = await websocket_manager.connect(bad_ws)
+
+        await asyncio.sleep(0.08)
+
+        assert bad_id not in websocket_manager.active_connections
+        assert good_id in websocket_manager.active_connections
+        assert good_ws.send_text.called
+
+        await websocket_manager.shutdown()
+
 
 class TestEventFiltering:
     """Test event filtering functionality."""
@@ -609,6 +769,10 @@ class TestShutdown:
         
         # Verify all connections are closed
         assert websocket_manager.get_connection_count() == 0
+        
+        # Monitor and per-client senders are all finished
+        assert not websocket_manager._tasks
+        assert websocket_manager._ping_task.done()
     
     @pytest.mark.asyncio
     async def test_shutdown_with_failing_connections(self, websocket_manager):
@@ -655,11 +819,59 @@ class TestConcurrency:
             for i in range(10)
         ]
         await asyncio.gather(*tasks)
+        await websocket_manager.flush_client_queues()
         
         # Each client should have received all messages
         for ws in websockets:
             assert len(ws.messages_sent) == 10
     
+    @pytest.mark.asyncio
+    async def test_broadcast_sends_concurrently(self, websocket_manager):
+        """Test that a slow client does not delay delivery to the others."""
+        release = asyncio.Event()
+        slow_ws = MockWebSocket()
+        fast_ws = MockWebSocket()
+        
+        async def slow_send(data: str) -> None:
+            await release.wait()
+            slow_ws._track_text(data)
+        
+        slow_ws.send_text.side_effect = slow_send
+        await websocket_manager.connect(slow_ws)
+        await websocket_manager.connect(fast_ws)
+        
+        # Broadcast returns without waiting for the slow client
+        await websocket_manager.broadcast({"event_type": "test"})
+        await asyncio.sleep(0.01)
+        
+        # Fast client already has the message while the slow one is blocked
+        assert len(fast_ws.messages_sent) == 1
+        assert len(slow_ws.messages_sent) == 0
+        
+        release.set()
+        await websocket_manager.flush_client_queues()
+        assert len(slow_ws.messages_sent) == 1
+    
+    @pytest.mark.asyncio
+    async def test_slow_client_evicted_when_queue_full(self, websocket_manager):
+        """Test that a client whose send queue fills up is disconnected."""
+        websocket_manager._send_queue_size = 2
+        stuck_ws = MockWebSocket()
+        
+        async def stuck_send(data: str) -> None:
+            await asyncio.Event().wait()
+        
+        stuck_ws.send_text.side_effect = stuck_send
+        client_id = await websocket_manager.connect(stuck_ws)
+        
+        # One frame is held by the sender, two fill the queue, the next overflows
+        for i in range(4):
+            await websocket_manager.broadcast({"event_type": "test", "id": i})
+            await asyncio.sleep(0)
+        
+        assert client_id not in websocket_manager.active_connections
+        stuck_ws.close.assert_awaited()
+    
     @pytest.mark.asyncio
     async def test_concurrent_disconnect(self, websocket_manager):
         """Test concurrent disconnections."""
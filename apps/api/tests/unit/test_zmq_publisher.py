@@ -0,0 +1,235 @@
+"""
+Unit tests for the ZMQ publisher: tick wire format and send batching.
+"""
+
+import asyncio
+import msgpack
+import pytest
+import zmq
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.services import zmq_publisher
+from app.services.zmq_publisher import TickPayload, ZMQPublisher, pack_message
+from app.utils.timezone import CHINA_TZ
+
+# Key order of the dict the publisher sent before TickPayload
+BASELINE_KEYS = [
+    'symbol', 'datetime', 'last_price', 'volume', 'last_volume',
+    'bid_price_1', 'ask_price_1', 'bid_volume_1', 'ask_volume_1',
+    'vt_symbol', 'processing_time'
+]
+
+PROCESSING_TIME = "2026-10-17T09:30:00.123+08:00"
+
+
+def make_tick(**overrides):
+    """A vnpy TickData-like object with every published field set."""
+    tick = dict(
+        symbol="rb2601",
+        datetime=datetime(2026, 10, 17, 9, 30, 0, 500000, tzinfo=CHINA_TZ),
+        last_price=3500.0,
+        volume=12000.0,
+        last_volume=5.0,
+        bid_price_1=3499.0,
+        ask_price_1=3501.0,
+        bid_volume_1=10.0,
+        ask_volume_1=8.0,
+        vt_symbol="rb2601.SHFE"
+    )
+    tick.update(overrides)
+    return SimpleNamespace(**tick)
+
+
+def baseline_dict(tick):
+    """The map a subscriber expects, built the way the old dict serializer did."""
+    return {
+        'symbol': tick.symbol,
+        'datetime': tick.datetime.isoformat(),
+        'last_price': tick.last_price,
+        'volume': tick.volume,
+        'last_volume': tick.last_volume,
+        'bid_price_1': tick.bid_price_1,
+        'ask_price_1': tick.ask_price_1,
+        'bid_volume_1': tick.bid_volume_1,
+        'ask_volume_1': tick.ask_volume_1,
+        'vt_symbol': tick.vt_symbol,
+        'processing_time': PROCESSING_TIME
+    }
+
+
+class TestTickWireFormat:
+    """Decode published payloads with plain msgpack, as subscribers do."""
+
+    @pytest.fixture(params=["msgpack", "ormsgpack"])
+    def encoder(self, request, monkeypatch):
+        """Run each test against both encoders pack_message can use."""
+        if request.param == "ormsgpack":
+            pytest.importorskip("ormsgpack")
+            monkeypatch.setattr(zmq_publisher, "ORMSGPACK_AVAILABLE", True)
+        else:
+            monkeypatch.setattr(zmq_publisher, "ORMSGPACK_AVAILABLE", False)
+        return request.param
+
+    def test_full_tick_matches_baseline_dict(self, encoder):
+        """Test that a complete tick decodes to the baseline map, key order included."""
+        tick = make_tick()
+        decoded = msgpack.unpackb(pack_message(TickPayload.from_tick(tick, PROCESSING_TIME)))
+
+        assert list(decoded) == BASELINE_KEYS
+        assert decoded == baseline_dict(tick)
+
+    def test_datetime_keeps_china_offset(self, encoder):
+        """Test that aware datetimes are sent as ISO strings with the +08:00 offset."""
+        decoded = msgpack.unpackb(pack_message(TickPayload.from_tick(make_tick(), PROCESSING_TIME)))
+
+        assert decoded['datetime'] == "2026-10-17T09:30:00.500000+08:00"
+        assert decoded['processing_time'].endswith("+08:00")
+
+    def test_missing_fields_are_nil(self, encoder):
+        """Test that fields the tick lacks are sent as nil, keeping all keys."""
+        tick = SimpleNamespace(symbol="rb2601", last_price=3500.0)
+        decoded = msgpack.unpackb(pack_message(TickPayload.from_tick(tick, PROCESSING_TIME)))
+
+        assert list(decoded) == BASELINE_KEYS
+        assert decoded['symbol'] == "rb2601"
+        assert decoded['last_price'] == 3500.0
+        assert decoded['datetime'] is None
+        assert decoded['vt_symbol'] is None
+        assert all(decoded[key] is None for key in BASELINE_KEYS[2:-1] if key != 'last_price')
+
+    def test_encoders_produce_identical_bytes(self):
+        """Test that ormsgpack and the msgpack fallback emit the same message."""
+        ormsgpack = pytest.importorskip("ormsgpack")
+        payload = TickPayload.from_tick(make_tick(), PROCESSING_TIME)
+
+        fallback = msgpack.packb(payload, default=zmq_publisher._msgpack_default)
+        native = ormsgpack.packb(payload, option=ormsgpack.OPT_SERIALIZE_NUMPY)
+
+        assert native == fallback
+
+
+class TestTickBatching:
+    """Test when queued ticks are actually sent."""
+
+    @pytest.fixture
+    async def publisher(self, unused_tcp_port):
+        """A publisher bound to a local port, shut down after the test."""
+        publisher = ZMQPublisher()
+        publisher.enabled = True
+        publisher.bind_address = "tcp://127.0.0.1"
+        publisher.port = unused_tcp_port
+        publisher.flush_interval = 10.0  # only a full batch or an explicit flush sends
+        assert await publisher.initialize()
+        yield publisher
+        await publisher.shutdown()
+
+    @pytest.fixture
+    async def subscriber(self, publisher):
+        """A SUB socket in its own context, subscribed to every topic."""
+        context = zmq.Context()
+        socket = context.socket(zmq.SUB)
+        socket.set(zmq.LINGER, 0)
+        socket.connect(f"tcp://127.0.0.1:{publisher.port}")
+        socket.subscribe(b"")
+        # Let the subscription reach the publisher before anything is sent
+        await asyncio.sleep(0.2)
+        publisher.socket.get(zmq.EVENTS)
+        yield socket
+        socket.close()
+        context.term()
+
+    @staticmethod
+    def receive_all(socket, timeout_ms=200):
+        """Decode every message that arrives within timeout_ms."""
+        messages = []
+        while socket.poll(timeout_ms):
+            topic, payload = socket.recv_multipart()
+            messages.append((topic, msgpack.unpackb(payload)))
+        return messages
+
+    async def test_full_batch_is_sent(self, publisher, subscriber):
+        """Test that reaching batch_size sends the whole batch at once."""
+        publisher.batch_size = 3
+
+        assert publisher.publish_tick(make_tick(last_price=1.0))
+        assert publisher.publish_tick(make_tick(last_price=2.0))
+        assert self.receive_all(subscriber, timeout_ms=50) == []
+        assert publisher.publish_count == 0
+
+        assert publisher.publish_tick(make_tick(last_price=3.0))
+        messages = self.receive_all(subscriber)
+
+        assert [topic for topic, _ in messages] == [b"rb2601.SHFE"] * 3
+        assert [payload['last_price'] for _, payload in messages] == [1.0, 2.0, 3.0]
+        assert publisher.publish_count == 3
+
+    async def test_partial_batch_is_sent_at_deadline(self, publisher, subscriber):
+        """Test that a lone tick goes out after flush_interval without further ticks."""
+        publisher.batch_size = 100
+        publisher.flush_interval = 0.02
+
+        assert publisher.publish_tick(make_tick())
+        assert publisher.publish_count == 0
+
+        await asyncio.sleep(0.1)
+        messages = self.receive_all(subscriber)
+
+        assert len(messages) == 1
+        assert publisher.publish_count == 1
+
+    async def test_default_batch_size_sends_inline(self, publisher, subscriber):
+        """Test that with batch_size 1 each tick is sent before publish_tick returns."""
+        publisher.batch_size = 1
+
+        assert publisher.publish_tick(make_tick())
+
+        assert publisher.publish_count == 1
+        assert publisher._pending == []
+        assert len(self.receive_all(subscriber)) == 1
+
+    async def test_shutdown_flushes_pending_ticks(self, publisher, subscriber):
+        """Test that ticks still queued at shutdown are sent, not discarded."""
+        publisher.batch_size = 100
+
+        publisher.publish_tick(make_tick(last_price=1.0))
+        publisher.publish_tick(make_tick(last_price=2.0))
+        await publisher.shutdown()
+
+        messages = self.receive_all(subscriber)
+        assert [payload['last_price'] for _, payload in messages] == [1.0, 2.0]
+        assert publisher.publish_count == 2
+
+
+class TestDroppedTicks:
+    """Test counting of ticks dropped at the send high water mark."""
+
+    async def test_dropped_count_rises_at_high_water_mark(self):
+        """Test that with nodrop, sends that hit the HWM are counted as dropped."""
+        publisher = ZMQPublisher()
+        publisher.enabled = True
+        publisher.bind_address = "inproc://zmq-publisher-hwm-test"
+        publisher.port = 1
+        publisher.queue_size = 1
+        publisher.batch_size = 1
+        publisher.nodrop = True
+        assert await publisher.initialize()
+
+        # inproc shares the publisher's context; the subscriber never reads
+        subscriber = publisher.context.socket(zmq.SUB)
+        subscriber.set(zmq.RCVHWM, 1)
+        subscriber.set(zmq.LINGER, 0)
+        subscriber.connect(f"{publisher.bind_address}:{publisher.port}")
+        subscriber.subscribe(b"")
+        await asyncio.sleep(0.05)
+        publisher.socket.get(zmq.EVENTS)
+
+        try:
+            results = [publisher.publish_tick(make_tick()) for _ in range(50)]
+
+            assert publisher.dropped_count > 0
+            assert publisher.publish_count + publisher.dropped_count == 50
+            assert results.count(False) == publisher.dropped_count
+        finally:
+            subscriber.close()
+            await publisher.shutdown()
@@ -9,6 +9,7 @@ import {
   WebSocketEventType,
   PingMessage,
   isPong,
+  isEventBatch,
 } from '@xiaoy-mdhub/shared-types';
 
 export type MessageHandler = (message: AnyWebSocketMessage) => void;
@@ -178,6 +179,12 @@ export class WebSocketClient {
         return;
       }
 
+      // Unwrap coalesced events and dispatch them in order
+      if (isEventBatch(message)) {
+        message.events.forEach((event) => this.dispatchMessage(event));
+        return;
+      }
+
       // Dispatch to handlers
       this.dispatchMessage(message);
     } catch (error) {
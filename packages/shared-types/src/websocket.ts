@@ -24,6 +24,9 @@ export enum WebSocketEventType {
   // Canary monitoring events
   CANARY_TICK_UPDATE = 'canary_tick_update',
   
+  // Several events coalesced into one frame
+  EVENT_BATCH = 'event_batch',
+  
   // Control events
   PING = 'ping',
   PONG = 'pong',
@@ -165,6 +168,14 @@ export interface ShutdownMessage extends WebSocketMessage {
   message: string;
 }
 
+/**
+ * Batch of events sent together in a single frame
+ */
+export interface EventBatchMessage extends WebSocketMessage {
+  event_type: WebSocketEventType.EVENT_BATCH;
+  events: AnyWebSocketMessage[];
+}
+
 /**
  * Union type for all WebSocket messages
  */
@@ -180,6 +191,7 @@ export type AnyWebSocketMessage =
   | PongMessage
   | ErrorMessage
   | ShutdownMessage
+  | EventBatchMessage
   | DashboardUpdateMessage;
 
 /**
@@ -232,6 +244,10 @@ export const isCanaryTickUpdate = (msg: AnyWebSocketMessage): msg is CanaryTickU
   return msg.event_type === WebSocketEventType.CANARY_TICK_UPDATE;
 };
 
+export const isEventBatch = (msg: AnyWebSocketMessage): msg is EventBatchMessage => {
+  return msg.event_type === WebSocketEventType.EVENT_BATCH;
+};
+
 export const isPing = (msg: AnyWebSocketMessage): msg is PingMessage => {
   return msg.type === 'ping';
 };